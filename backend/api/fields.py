@@ -0,0 +1,143 @@
+import base64
+import binascii
+import hashlib
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image
+from rest_framework import serializers
+
+DATA_URI_SEPARATOR = ';base64,'
+DATA_URI_HEADER_LENGTH = 100
+WHITESPACE = ' \t\r\n'
+
+
+class RecipeImageField(serializers.ImageField):
+    """Изображение в base64, декодируемое по частям во временный файл.
+
+    Строка не декодируется целиком в память, а изображение проверяется
+    по заголовку без распаковки пикселей. Размер файла и число пикселей
+    ограничены настройками RECIPE_IMAGE_MAX_SIZE и
+    RECIPE_IMAGE_MAX_PIXELS. Файл получает имя по хешу содержимого,
+    поэтому имена уменьшенных копий однозначно соответствуют исходнику.
+    """
+
+    ALLOWED_FORMATS = {
+        'JPEG': 'jpg',
+        'PNG': 'png',
+        'GIF': 'gif',
+        'WEBP': 'webp',
+    }
+    CHUNK_SIZE = 64 * 1024
+
+    default_error_messages = {
+        'invalid_base64': 'Изображение должно быть передано в base64.',
+        'invalid_image': (
+            'Загрузите изображение в формате JPEG, PNG, GIF или WebP.'
+        ),
+        'too_large': 'Размер изображения не должен превышать {max_size} байт.',
+        'too_many_pixels': (
+            'Изображение не должно содержать больше {max_pixels} пикселей.'
+        ),
+    }
+
+    def get_max_length(self):
+        """Наибольшая длина base64 для RECIPE_IMAGE_MAX_SIZE байт
+        с переводами строк, как в MIME: CRLF после каждых 76 символов."""
+        length = -(-settings.RECIPE_IMAGE_MAX_SIZE // 3) * 4
+        return length + length // 76 * 2 + 2
+
+    def decode(self, data, offset):
+        """Пишет декодированные данные во временный файл.
+
+        Файлы до FILE_UPLOAD_MAX_MEMORY_SIZE байт остаются в памяти,
+        более крупные сразу пишутся на диск. Слишком длинная строка
+        отклоняется до удаления пробельных символов, чтобы не копировать
+        ее."""
+        if len(data) - offset > self.get_max_length():
+            self.fail('too_large', max_size=settings.RECIPE_IMAGE_MAX_SIZE)
+        if any(space in data for space in WHITESPACE):
+            data, offset = ''.join(data[offset:].split()), 0
+        size = (len(data) - offset) * 3 // 4 - data[-2:].count('=')
+        if size > settings.RECIPE_IMAGE_MAX_SIZE:
+            self.fail('too_large', max_size=settings.RECIPE_IMAGE_MAX_SIZE)
+        file = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        if size > settings.FILE_UPLOAD_MAX_MEMORY_SIZE:
+            file.rollover()
+        digest = hashlib.sha256()
+        try:
+            for start in range(offset, len(data), self.CHUNK_SIZE):
+                chunk = base64.b64decode(
+                    data[start:start + self.CHUNK_SIZE]
+                )
+                digest.update(chunk)
+                file.write(chunk)
+        except (binascii.Error, ValueError):
+            file.close()
+            self.fail('invalid_base64')
+        file.seek(0)
+        return file, size, digest.hexdigest()[:32]
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str) or not data:
+            self.fail('invalid_base64')
+        offset = data.find(DATA_URI_SEPARATOR, 0, DATA_URI_HEADER_LENGTH)
+        offset = 0 if offset == -1 else offset + len(DATA_URI_SEPARATOR)
+        file, size, digest = self.decode(data, offset)
+        try:
+            with Image.open(file) as image:
+                format = image.format
+                width, height = image.size
+        except (OSError, Image.DecompressionBombError):
+            file.close()
+            self.fail('invalid_image')
+        if format not in self.ALLOWED_FORMATS:
+            file.close()
+            self.fail('invalid_image')
+        if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+            file.close()
+            self.fail(
+                'too_many_pixels',
+                max_pixels=settings.RECIPE_IMAGE_MAX_PIXELS
+            )
+        file.seek(0)
+        return UploadedFile(
+            file,
+            name=f'{digest}.{self.ALLOWED_FORMATS[format]}',
+            content_type=Image.MIME[format],
+            size=size
+        )
+
+
+class ImageSrcsetField(serializers.Field):
+    """Набор уменьшенных копий изображения рецепта в виде srcset
+    для каждого формата.
+
+    Пока копии текущего изображения не построены, возвращает пустой
+    словарь, и клиент использует поле image."""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        variants = recipe.image_variants
+        if not recipe.image or variants.get('source') != recipe.image.name:
+            return {}
+        request = self.context.get('request')
+        srcset = {}
+        for format, items in variants.items():
+            if format == 'source':
+                continue
+            urls = []
+            for name, width in items:
+                url = recipe.image.storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                urls.append(f'{url} {width}w')
+            srcset[format] = ', '.join(urls)
+        return srcset
@@ -1,29 +1,98 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import (Case, Exists, IntegerField, OuterRef, Value,
+                              When)
 from django_filters import rest_framework as filters
 
-from recipes.models import Ingredient, Recipe
+from recipes.cache import get_version
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.search import search_recipes
+
+from .indexes import count_bitmap, from_bitmap, recipe_tag_index
 
 
 class IngredientSearchFilter(filters.FilterSet):
     """Фильтр поиска по названию ингредиента."""
-    name = filters.CharFilter(lookup_expr='istartswith')
+    name = filters.CharFilter(method='get_name')
 
     class Meta:
         model = Ingredient
         fields = ('name', )
 
+    def get_name(self, queryset, name, value):
+        """Ищет сначала по началу названия, затем по подстроке."""
+        return queryset.filter(name__icontains=value).annotate(
+            is_prefix=Case(
+                When(name__istartswith=value, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField()
+            )
+        ).order_by('is_prefix', 'name')[:settings.INGREDIENT_SEARCH_LIMIT]
+
+
+def get_tag_choices():
+    """Список тегов для фильтра, закэшированный до изменения тегов."""
+    key = f'tag_choices:{get_version("tags")}'
+    choices = cache.get(key)
+    if choices is None:
+        choices = list(Tag.objects.values_list('slug', 'name'))
+        cache.set(key, choices, settings.CATALOG_CACHE_TIMEOUT)
+    return choices
+
 
 class RecipeFilter(filters.FilterSet):
     """Фильтр выборки рецептов по определенным полям."""
 
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = filters.MultipleChoiceFilter(
+        field_name='tags__slug',
+        choices=get_tag_choices,
+        method='get_tags'
+    )
     is_favorited = filters.BooleanFilter(method='get_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='get_search')
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'по популярности'),),
+        method='get_ordering'
+    )
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'tags',
+            'author',
+            'is_favorited',
+            'is_in_shopping_cart',
+            'search',
+            'ordering'
+        )
+
+    def get_tags(self, queryset, name, value):
+        """Отбирает рецепты хотя бы с одним из тегов.
+
+        С журналом изменений рецептов (RECIPE_CHANGE_LOG) используются
+        битовые карты: если теги покрывают все рецепты, фильтр не нужен,
+        а небольшой результат передается в запрос списком id. Без него
+        карта, устаревшая после изменения в другом процессе, теряла бы
+        рецепты, поэтому там и для большого результата используется
+        проверка EXISTS по таблице связей, без JOIN и DISTINCT."""
+        if not value:
+            return queryset
+        if settings.RECIPE_CHANGE_LOG:
+            bitmap = recipe_tag_index.resolve(value)
+            if bitmap == recipe_tag_index.all:
+                return queryset
+            if not bitmap:
+                return queryset.none()
+            if count_bitmap(bitmap) <= settings.RECIPE_TAG_FILTER_MAX_IDS:
+                return queryset.filter(pk__in=from_bitmap(bitmap))
+        return queryset.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe=OuterRef('pk'), tag__slug__in=value
+            )
+        ))
 
     def get_is_favorited(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
@@ -34,3 +103,17 @@ class RecipeFilter(filters.FilterSet):
         if value and self.request.user.is_authenticated:
             return queryset.filter(shopping_list__user=self.request.user)
         return queryset
+
+    def get_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию, описанию и ингредиентам
+        с сортировкой по релевантности."""
+        return search_recipes(queryset, value)
+
+    def get_ordering(self, queryset, name, value):
+        """Сортирует рецепты по счетчику добавлений в избранное.
+
+        Курсорная пагинация задает свой порядок, поэтому вместе с этим
+        параметром не допускается."""
+        if value == 'popular':
+            return queryset.order_by('-favorites_count', '-pub_date', '-id')
+        return queryset
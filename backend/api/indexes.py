@@ -0,0 +1,370 @@
+import bisect
+import heapq
+import re
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import Counter, defaultdict
+from itertools import chain
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.cache import get_version
+from recipes.models import Ingredient, IngredientAmount, Recipe
+
+NONZERO_BYTE = re.compile(rb'[^\x00]')
+
+
+class IngredientNameIndex:
+    """Индекс названий ингредиентов в памяти процесса.
+
+    Хранит отсортированный массив названий в нижнем регистре и отвечает
+    сначала совпадениями по началу названия, затем по подстроке. Индекс
+    перестраивается при смене версии каталога ингредиентов и не реже чем
+    раз в INGREDIENT_INDEX_TTL секунд."""
+
+    namespace = 'ingredients'
+
+    def __init__(self):
+        self.version = None
+        self.built = 0
+        self.data = ([], [])
+
+    def build(self):
+        version = get_version(self.namespace)
+        ingredients = sorted(
+            (
+                (name.casefold(), {
+                    'id': pk,
+                    'name': name,
+                    'measurement_unit': measurement_unit,
+                })
+                for pk, name, measurement_unit in
+                Ingredient.objects.values_list(
+                    'pk', 'name', 'measurement_unit'
+                )
+            ),
+            key=lambda ingredient: (ingredient[0], ingredient[1]['id'])
+        )
+        self.data = (
+            [key for key, _ in ingredients],
+            [row for _, row in ingredients]
+        )
+        self.version = version
+        self.built = time.monotonic()
+
+    def refresh(self):
+        if (time.monotonic() - self.built > settings.INGREDIENT_INDEX_TTL
+                or get_version(self.namespace) != self.version):
+            self.build()
+
+    def search(self, value, limit=None):
+        """Ищет ингредиенты по началу названия, затем по подстроке."""
+        self.refresh()
+        keys, rows = self.data
+        value = value.casefold()
+        limit = limit or settings.INGREDIENT_SEARCH_LIMIT
+        start = bisect.bisect_left(keys, value)
+        end = start
+        while end < len(keys) and keys[end].startswith(value):
+            end += 1
+        result = rows[start:min(end, start + limit)]
+        if len(result) < limit:
+            for position, key in enumerate(keys):
+                if start <= position < end or value not in key:
+                    continue
+                result.append(rows[position])
+                if len(result) == limit:
+                    break
+        return result
+
+
+class RecipeChangeLog:
+    """Журнал рецептов, изменившихся после построения индексов.
+
+    Записи хранятся в общем кэше под порядковыми номерами, поэтому
+    каждый процесс может дочитать журнал со своего места и обновить
+    индексы в памяти только по изменившимся рецептам."""
+
+    def __init__(self, name):
+        self.name = name
+        self.sequence_key = f'{name}:sequence'
+
+    def get_key(self, sequence):
+        return f'{self.name}:change:{sequence}'
+
+    def get_sequence(self):
+        return cache.get(self.sequence_key, 0)
+
+    def record(self, recipe_id):
+        if not settings.RECIPE_CHANGE_LOG:
+            return
+        cache.add(self.sequence_key, 0, None)
+        try:
+            sequence = cache.incr(self.sequence_key)
+        except ValueError:
+            return
+        cache.set(
+            self.get_key(sequence), recipe_id, settings.RECIPE_INDEX_TTL
+        )
+
+    def get_changes(self, start, end):
+        """Возвращает id рецептов из записей с номерами от start
+        до end включительно или None, если часть записей потеряна."""
+        keys = [self.get_key(number) for number in range(start, end + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            return None
+        return set(changes.values())
+
+
+recipe_ingredient_changes = RecipeChangeLog('recipe_ingredients')
+recipe_tag_changes = RecipeChangeLog('recipe_tags')
+
+
+class RecipeIndex(ABC):
+    """Индекс рецептов в памяти процесса, который обновляется по журналу
+    изменений.
+
+    Если журнал отстал больше чем на RECIPE_INDEX_MAX_CHANGES записей
+    или часть записей вытеснена из кэша, индекс строится заново; в любом
+    случае не реже чем раз в RECIPE_INDEX_TTL секунд."""
+
+    changes = None
+
+    def __init__(self):
+        self.sequence = None
+        self.built = 0
+
+    @abstractmethod
+    def build(self):
+        """Строит индекс по всем рецептам."""
+
+    @abstractmethod
+    def apply(self, recipe_ids):
+        """Переносит в индекс изменения перечисленных рецептов."""
+
+    def is_outdated(self):
+        return (
+            not self.built
+            or time.monotonic() - self.built > settings.RECIPE_INDEX_TTL
+        )
+
+    def rebuild(self):
+        sequence = self.changes.get_sequence()
+        self.build()
+        self.sequence = sequence
+        self.built = time.monotonic()
+
+    def refresh(self):
+        if self.is_outdated():
+            return self.rebuild()
+        sequence = self.changes.get_sequence()
+        if sequence == self.sequence:
+            return
+        recipe_ids = None
+        if 0 < sequence - self.sequence <= settings.RECIPE_INDEX_MAX_CHANGES:
+            recipe_ids = self.changes.get_changes(self.sequence + 1, sequence)
+        if recipe_ids is None:
+            return self.rebuild()
+        self.apply(recipe_ids)
+        self.sequence = sequence
+
+
+class RecipeIngredientIndex(RecipeIndex):
+    """Инвертированный индекс «ингредиент → рецепты».
+
+    Для каждого ингредиента хранит отсортированный массив id рецептов,
+    для каждого рецепта — кортеж id его ингредиентов."""
+
+    changes = recipe_ingredient_changes
+
+    def __init__(self):
+        super().__init__()
+        self.postings = {}
+        self.recipes = {}
+
+    def build(self):
+        postings = defaultdict(list)
+        recipes = defaultdict(list)
+        amounts = IngredientAmount.objects.order_by().values_list(
+            'ingredient_id', 'recipe_id'
+        )
+        for ingredient_id, recipe_id in amounts.iterator():
+            postings[ingredient_id].append(recipe_id)
+            recipes[recipe_id].append(ingredient_id)
+        self.postings = {
+            ingredient_id: array('q', sorted(recipe_ids))
+            for ingredient_id, recipe_ids in postings.items()
+        }
+        self.recipes = {
+            recipe_id: tuple(sorted(ingredient_ids))
+            for recipe_id, ingredient_ids in recipes.items()
+        }
+
+    def apply(self, recipe_ids):
+        """Перечитывает состав изменившихся рецептов и переносит отличия
+        в массивы ингредиентов."""
+        current = defaultdict(set)
+        amounts = IngredientAmount.objects.filter(
+            recipe__in=recipe_ids
+        ).order_by().values_list('recipe_id', 'ingredient_id')
+        for recipe_id, ingredient_id in amounts:
+            current[recipe_id].add(ingredient_id)
+        for recipe_id in recipe_ids:
+            old = set(self.recipes.pop(recipe_id, ()))
+            new = current[recipe_id]
+            for ingredient_id in old - new:
+                recipes = self.postings[ingredient_id]
+                position = bisect.bisect_left(recipes, recipe_id)
+                if position < len(recipes) and recipes[position] == recipe_id:
+                    recipes.pop(position)
+            for ingredient_id in new - old:
+                recipes = self.postings.setdefault(ingredient_id, array('q'))
+                position = bisect.bisect_left(recipes, recipe_id)
+                if position == len(recipes) or recipes[position] != recipe_id:
+                    recipes.insert(position, recipe_id)
+            if new:
+                self.recipes[recipe_id] = tuple(sorted(new))
+
+    def contains(self, recipes, recipe_id):
+        position = bisect.bisect_left(recipes, recipe_id)
+        return position < len(recipes) and recipes[position] == recipe_id
+
+    def search(self, ingredient_ids, match='best', limit=None):
+        """Возвращает id рецептов, подобранных по набору ингредиентов.
+
+        all — рецепты со всеми ингредиентами набора, сначала новые;
+        any — рецепты хотя бы с одним, по числу совпавших ингредиентов;
+        best — по доле ингредиентов рецепта, которые есть в наборе."""
+        self.refresh()
+        limit = limit or settings.RECIPE_DISCOVERY_LIMIT
+        postings = sorted(
+            (self.postings.get(pk, ()) for pk in set(ingredient_ids)),
+            key=len
+        )
+        if not postings:
+            return []
+        if match == 'all':
+            shortest, *others = postings
+            return heapq.nlargest(limit, (
+                recipe_id for recipe_id in shortest
+                if all(
+                    self.contains(recipes, recipe_id) for recipes in others
+                )
+            ))
+        counts = Counter(chain.from_iterable(postings))
+        if match == 'any':
+            return heapq.nlargest(
+                limit, counts, key=lambda pk: (counts[pk], pk)
+            )
+        return heapq.nlargest(limit, counts, key=lambda pk: (
+            counts[pk] / len(self.recipes[pk]), counts[pk], pk
+        ))
+
+
+def to_bitmap(recipe_ids):
+    """Собирает битовую карту из id рецептов за один проход."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return 0
+    bits = bytearray(max(recipe_ids) // 8 + 1)
+    for recipe_id in recipe_ids:
+        bits[recipe_id >> 3] |= 1 << (recipe_id & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def from_bitmap(bitmap):
+    """Возвращает id рецептов из битовой карты по убыванию."""
+    bits = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    return [
+        match.start() * 8 + bit
+        for match in reversed(list(NONZERO_BYTE.finditer(bits)))
+        for bit in range(7, -1, -1) if bits[match.start()] >> bit & 1
+    ]
+
+
+def count_bitmap(bitmap):
+    return bin(bitmap).count('1')
+
+
+class RecipeTagIndex(RecipeIndex):
+    """Битовые карты рецептов по slug тега.
+
+    Бит с номером id рецепта установлен, если у рецепта есть тег.
+    Отдельная карта all отмечает все существующие рецепты. Изменение
+    самих тегов меняет версию каталога тегов и перестраивает индекс."""
+
+    changes = recipe_tag_changes
+    namespace = 'tags'
+
+    def __init__(self):
+        super().__init__()
+        self.version = None
+        self.bitmaps = {}
+        self.all = 0
+
+    def is_outdated(self):
+        return (
+            super().is_outdated()
+            or get_version(self.namespace) != self.version
+        )
+
+    def build(self):
+        self.version = get_version(self.namespace)
+        recipes = defaultdict(list)
+        tags = Recipe.tags.through.objects.order_by().values_list(
+            'tag__slug', 'recipe_id'
+        )
+        for slug, recipe_id in tags.iterator():
+            recipes[slug].append(recipe_id)
+        self.bitmaps = {
+            slug: to_bitmap(recipe_ids)
+            for slug, recipe_ids in recipes.items()
+        }
+        self.all = to_bitmap(
+            Recipe.objects.order_by().values_list('pk', flat=True).iterator()
+        )
+
+    def apply(self, recipe_ids):
+        """Снимает биты изменившихся рецептов и ставит их заново по
+        текущим тегам."""
+        mask = to_bitmap(recipe_ids)
+        tags = Recipe.tags.through.objects.filter(
+            recipe__in=recipe_ids
+        ).order_by().values_list('tag__slug', 'recipe_id')
+        current = defaultdict(list)
+        for slug, recipe_id in tags:
+            current[slug].append(recipe_id)
+        for slug in set(self.bitmaps) | set(current):
+            self.bitmaps[slug] = (
+                self.bitmaps.get(slug, 0) & ~mask
+                | to_bitmap(current.get(slug, ()))
+            )
+        self.all = self.all & ~mask | to_bitmap(
+            Recipe.objects.filter(pk__in=recipe_ids).values_list(
+                'pk', flat=True
+            )
+        )
+
+    def resolve(self, slugs):
+        """Битовая карта рецептов хотя бы с одним из тегов."""
+        self.refresh()
+        bitmap = 0
+        for slug in slugs:
+            bitmap |= self.bitmaps.get(slug, 0)
+        return bitmap
+
+
+ingredient_index = IngredientNameIndex()
+recipe_ingredient_index = RecipeIngredientIndex()
+recipe_tag_index = RecipeTagIndex()
+
+
+def reset_indexes():
+    """Сбрасывает индексы процесса: следующее обращение построит их
+    заново, как после запуска. Нужен для замеров с холодным кэшем."""
+    for index in (ingredient_index, recipe_ingredient_index,
+                  recipe_tag_index):
+        index.built = 0
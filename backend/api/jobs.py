@@ -0,0 +1,105 @@
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.utils import timezone
+
+from recipes import workers
+from recipes.models import ShoppingCartJob
+
+from .renderers import get_shopping_cart_renderers
+from .utils_shopping_cart import get_shopping_cart_ingredients
+
+logger = logging.getLogger(__name__)
+
+
+def run_shopping_cart_job(job_id):
+    """Генерирует файл задачи, если ее еще не взял другой обработчик."""
+    claimed = ShoppingCartJob.objects.filter(
+        pk=job_id, status=ShoppingCartJob.PENDING
+    ).update(status=ShoppingCartJob.RUNNING, started=timezone.now())
+    if not claimed:
+        return
+    job = ShoppingCartJob.objects.select_related('user').get(pk=job_id)
+    renderers = {
+        renderer.format: renderer
+        for renderer in get_shopping_cart_renderers()
+    }
+    try:
+        response = renderers[job.format]().get_response(
+            get_shopping_cart_ingredients(job.user).iterator()
+        )
+        with tempfile.TemporaryFile() as content:
+            for chunk in response.streaming_content:
+                content.write(chunk)
+            response.close()
+            job.file.save(
+                f'{job.pk}.{job.format}', File(content), save=False
+            )
+        job.status = ShoppingCartJob.DONE
+    except Exception:
+        logger.exception('Не удалось сформировать список покупок %s', job.pk)
+        job.status = ShoppingCartJob.FAILED
+    job.save(update_fields=('file', 'status'))
+
+
+def enqueue_shopping_cart_job(job):
+    """Ставит задачу в пул фоновых потоков.
+
+    При BACKGROUND_WORKERS = 0 задачи остаются в базе и
+    выполняются командой process_shopping_cart_jobs."""
+    workers.submit(run_shopping_cart_job, job.pk)
+
+
+def requeue_stale_jobs():
+    """Возвращает в очередь задачи, которые выполняются или ждут в
+    очереди дольше SHOPPING_CART_JOB_TIMEOUT: их обработчик, скорее
+    всего, упал вместе с пулом потоков процесса.
+
+    Повторная постановка безопасна: задачу выполнит только тот, кто
+    первым переведет ее в RUNNING."""
+    deadline = timezone.now() - timedelta(
+        seconds=settings.SHOPPING_CART_JOB_TIMEOUT
+    )
+    stale = list(ShoppingCartJob.objects.filter(
+        status=ShoppingCartJob.RUNNING, started__lt=deadline
+    ).values_list('pk', flat=True))
+    ShoppingCartJob.objects.filter(
+        pk__in=stale, status=ShoppingCartJob.RUNNING
+    ).update(status=ShoppingCartJob.PENDING, started=None)
+    stale += ShoppingCartJob.objects.filter(
+        status=ShoppingCartJob.PENDING, created__lt=deadline
+    ).exclude(pk__in=stale).values_list('pk', flat=True)
+    for job_id in stale:
+        workers.submit(run_shopping_cart_job, job_id)
+    return len(stale)
+
+
+def delete_expired_jobs():
+    """Удаляет задачи старше SHOPPING_CART_JOB_TTL вместе с файлами."""
+    expired = ShoppingCartJob.objects.filter(
+        created__lt=timezone.now() - timedelta(
+            seconds=settings.SHOPPING_CART_JOB_TTL
+        )
+    ).exclude(status=ShoppingCartJob.RUNNING)
+    deleted = 0
+    for job in expired.only('pk', 'file').iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        deleted += 1
+    return deleted
+
+
+def cleanup_shopping_cart_jobs():
+    """Чистит очередь не чаще раза в SHOPPING_CART_JOB_CLEANUP_INTERVAL
+    на все процессы, поэтому ее можно вызывать из запросов."""
+    if cache.add(
+        'shopping_cart_jobs:cleanup', True,
+        settings.SHOPPING_CART_JOB_CLEANUP_INTERVAL
+    ):
+        requeue_stale_jobs()
+        delete_expired_jobs()
@@ -0,0 +1,235 @@
+import json
+import subprocess
+import time
+import tracemalloc
+from random import Random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import (CaptureQueriesContext, setup_test_environment,
+                               teardown_test_environment)
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.metrics import get_query_budget
+from api.tests.fixtures import (LOCAL_CACHES, clear_caches, get, get_routes,
+                                seed)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, round(fraction * (len(values) - 1)))]
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполнить тестовую базу синтетическими данными и замерить '
+        'время, количество SQL-запросов и память маршрутов API'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=8
+        )
+        parser.add_argument('--tags', type=int, default=10)
+        parser.add_argument(
+            '--subscriptions', type=int, default=20,
+            help='Подписок на одного пользователя'
+        )
+        parser.add_argument(
+            '--favorites', type=int, default=30,
+            help='Рецептов в избранном на одного пользователя'
+        )
+        parser.add_argument(
+            '--cart', type=int, default=10,
+            help='Рецептов в списке покупок на одного пользователя'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Количество замеров каждого маршрута'
+        )
+        parser.add_argument(
+            '--routes', nargs='+',
+            help='Замерять только перечисленные маршруты'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш и индексы процесса перед каждым запросом'
+        )
+        parser.add_argument(
+            '--output', help='Сохранить результаты в JSON-файл'
+        )
+        parser.add_argument(
+            '--compare', help='JSON-файл предыдущего запуска для сравнения'
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Завершиться с ошибкой, если запросов к базе стало больше '
+                 'или превышен бюджет вью'
+        )
+
+    def measure(self, client, path, repeat, cold):
+        response = get(client, path)
+        if response.status_code != 200:
+            raise CommandError(
+                f'{path}: ответ {response.status_code} {response.content!r}'
+            )
+        durations, queries = [], []
+        for _ in range(repeat):
+            if cold:
+                clear_caches()
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                get(client, path)
+                durations.append(time.perf_counter() - start)
+            queries.append(len(context))
+        if cold:
+            clear_caches()
+        tracemalloc.start()
+        get(client, path)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {
+            'path': path,
+            'p50_ms': round(percentile(durations, 0.5) * 1000, 2),
+            'p95_ms': round(percentile(durations, 0.95) * 1000, 2),
+            'queries': percentile(queries, 0.5),
+            'queries_max': max(queries),
+            'budget': get_query_budget(response.wsgi_request),
+            'peak_kb': round(peak / 1024),
+        }
+
+    def run(self, options):
+        rng = Random(options['seed'])
+        start = time.perf_counter()
+        user_ids, recipe_ids, ingredient_ids = seed(rng, options)
+        self.stdout.write(
+            f'Данные созданы за {time.perf_counter() - start:.1f} с'
+        )
+        token = Token.objects.create(user_id=rng.choice(user_ids))
+        anonymous = Client()
+        authenticated = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        results = {}
+        self.stdout.write(
+            f'{"маршрут":<28} {"p50, мс":>8} {"p95, мс":>8} '
+            f'{"запросы":>8} {"бюджет":>7} {"пик, КБ":>8}'
+        )
+        for name, auth, path in get_routes(rng, recipe_ids, ingredient_ids):
+            if options['routes'] and name not in options['routes']:
+                continue
+            result = results[name] = self.measure(
+                authenticated if auth else anonymous,
+                path,
+                options['repeat'],
+                options['cold']
+            )
+            budget = result['budget']
+            self.stdout.write(
+                f'{name:<28} {result["p50_ms"]:>8.1f} '
+                f'{result["p95_ms"]:>8.1f} {result["queries_max"]:>8} '
+                f'{"-" if budget is None else budget:>7} '
+                f'{result["peak_kb"]:>8}'
+            )
+        return results
+
+    def compare(self, report, previous):
+        """Печатает изменения относительно предыдущего запуска и
+        возвращает список регрессий по количеству запросов."""
+        regressions = []
+        self.stdout.write(
+            f'\nСравнение с {previous.get("commit") or "предыдущим"}:'
+        )
+        if any(
+            previous.get(field) != report[field]
+            for field in ('dataset', 'database', 'cold')
+        ):
+            self.stdout.write(self.style.WARNING(
+                'Данные, база или режим кэша отличаются от предыдущего '
+                'запуска: сравнение может быть некорректным'
+            ))
+        for name, result in report['routes'].items():
+            old = previous['routes'].get(name)
+            if old is None:
+                continue
+            change = (
+                (result['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100
+                if old['p50_ms'] else 0
+            )
+            line = (
+                f'{name:<28} p50 {old["p50_ms"]:.1f} -> '
+                f'{result["p50_ms"]:.1f} мс ({change:+.0f}%), запросы '
+                f'{old["queries_max"]} -> {result["queries_max"]}'
+            )
+            if result['queries_max'] > old['queries_max']:
+                regressions.append(name)
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+        return regressions
+
+    def handle(self, *args, **options):
+        previous = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as data_file:
+                previous = json.load(data_file)
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            with override_settings(
+                CACHES=LOCAL_CACHES, BACKGROUND_WORKERS=0,
+                QUERY_BUDGET_STRICT=False
+            ):
+                results = self.run(options)
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+        report = {
+            'commit': get_commit(),
+            'created': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'dataset': {
+                field: options[field] for field in (
+                    'users', 'recipes', 'ingredients',
+                    'ingredients_per_recipe', 'tags', 'subscriptions',
+                    'favorites', 'cart', 'seed',
+                )
+            },
+            'repeat': options['repeat'],
+            'cold': options['cold'],
+            'routes': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as data_file:
+                json.dump(report, data_file, ensure_ascii=False, indent=2)
+        problems = [
+            name for name, result in results.items()
+            if result['budget'] is not None
+            and result['queries_max'] > result['budget']
+        ]
+        if problems:
+            self.stdout.write(self.style.WARNING(
+                f'Превышен бюджет запросов: {", ".join(problems)}'
+            ))
+        if previous is not None:
+            problems += self.compare(report, previous)
+        if problems and options['fail_on_regression']:
+            raise CommandError(
+                f'Регрессии запросов: {", ".join(sorted(set(problems)))}'
+            )
@@ -0,0 +1,61 @@
+import base64
+import io
+import os
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+
+from api.fields import RecipeImageField
+
+
+def make_image(megapixels):
+    """Строит JPEG из случайного шума, который плохо сжимается."""
+    side = int((megapixels * 1000 * 1000) ** 0.5)
+    image = Image.frombytes('RGB', (side, side), os.urandom(side * side * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return 'data:image/jpeg;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class Command(BaseCommand):
+    help = 'Сравнить прежнее и потоковое декодирование изображений base64'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--megapixels', nargs='+', type=float, default=[1, 4, 12],
+            help='Размеры тестовых изображений в мегапикселях'
+        )
+
+    def measure(self, field, data):
+        tracemalloc.start()
+        start = time.perf_counter()
+        file = field.to_internal_value(data)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        file.close()
+        return elapsed, peak
+
+    def handle(self, *args, **options):
+        fields = (
+            ('legacy', Base64ImageField(max_length=None)),
+            ('current', RecipeImageField(max_length=None)),
+        )
+        self.stdout.write(
+            f'{"Мп":>5} {"файл, КБ":>9} {"версия":>8} '
+            f'{"время, мс":>10} {"пик, КБ":>9}'
+        )
+        for megapixels in options['megapixels']:
+            data = make_image(megapixels)
+            size = len(data) * 3 // 4
+            for name, field in fields:
+                elapsed, peak = self.measure(field, data)
+                self.stdout.write(
+                    f'{megapixels:>5} {size / 1024:>9.0f} {name:>8} '
+                    f'{elapsed * 1000:>10.1f} {peak / 1024:>9.0f}'
+                )
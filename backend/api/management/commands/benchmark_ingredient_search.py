@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.filters import IngredientSearchFilter
+from api.indexes import ingredient_index
+from recipes.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = 'Сравнить скорость поиска ингредиентов по названию'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seconds', type=float, default=2.0,
+            help='Длительность замера каждого способа поиска'
+        )
+
+    def measure(self, search, prefixes, seconds):
+        count = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            search(prefixes[count % len(prefixes)])
+            count += 1
+        return count / (time.perf_counter() - start)
+
+    def handle(self, *args, **options):
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        if not names:
+            raise CommandError(
+                'Каталог ингредиентов пуст, выполните load_json_data'
+            )
+        prefixes = sorted({
+            name[:length] for name in names for length in (1, 2, 3)
+        })
+        queryset = Ingredient.objects.all()
+        searches = (
+            ('istartswith', lambda value: list(
+                queryset.filter(name__istartswith=value)
+            )),
+            ('IngredientSearchFilter', lambda value: list(
+                IngredientSearchFilter({'name': value}, queryset).qs
+            )),
+            ('ingredient_index', ingredient_index.search),
+        )
+        ingredient_index.build()
+        self.stdout.write(
+            f'Ингредиентов: {len(names)}, запросов: {len(prefixes)}'
+        )
+        for name, search in searches:
+            rate = self.measure(search, prefixes, options['seconds'])
+            self.stdout.write(f'{name:>24}: {rate:>10.0f} запросов/с')
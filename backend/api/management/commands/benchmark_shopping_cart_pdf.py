@@ -0,0 +1,102 @@
+import io
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from api.utils_shopping_cart_pdf import (FONT_NAME, create_shopping_cart,
+                                         draw_shopping_cart)
+
+
+def legacy_create_shopping_cart(ingredients_cart):
+    """Прежняя реализация: регистрация шрифта на каждый запрос и сборка
+    документа в памяти с двумя копиями."""
+    response = HttpResponse(content_type='application/pdf')
+    pdfmetrics.registerFont(
+        TTFont(FONT_NAME, str(settings.CSV_FILES_DIR / 'arial.ttf'))
+    )
+    buffer = io.BytesIO()
+    pdf_file = canvas.Canvas(buffer)
+    draw_shopping_cart(pdf_file, ingredients_cart)
+    pdf_file.save()
+    pdf = buffer.getvalue()
+    buffer.close()
+    response.write(pdf)
+    return response
+
+
+def consume(response):
+    """Читает ответ целиком, возвращает время до первого блока и размер."""
+    start = time.perf_counter()
+    first_byte = None
+    size = 0
+    chunks = response.streaming_content if response.streaming else [
+        response.content
+    ]
+    for chunk in chunks:
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        size += len(chunk)
+    response.close()
+    return first_byte or 0, size
+
+
+class Command(BaseCommand):
+    help = 'Сравнить прежнюю и текущую генерацию PDF списка покупок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[10, 500, 5000],
+            help='Количество строк в списке покупок'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Количество повторов для каждого размера'
+        )
+
+    def measure(self, create, ingredients_cart, repeat):
+        total = first_byte = peak = size = 0
+        for _ in range(repeat):
+            tracemalloc.start()
+            start = time.perf_counter()
+            response = create(ingredients_cart)
+            render = time.perf_counter() - start
+            ttfb, size = consume(response)
+            total += time.perf_counter() - start
+            first_byte += render + ttfb
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        return total / repeat, first_byte / repeat, peak, size
+
+    def handle(self, *args, **options):
+        paths = (
+            ('legacy', legacy_create_shopping_cart),
+            ('current', create_shopping_cart),
+        )
+        self.stdout.write(
+            f'{"строк":>6} {"версия":>8} {"всего, мс":>10} '
+            f'{"TTFB, мс":>9} {"пик, КБ":>9} {"размер, КБ":>11}'
+        )
+        for lines in options['sizes']:
+            ingredients_cart = [
+                {
+                    'ingredient__name': f'ингредиент {number}',
+                    'ingredient__measurement_unit': 'г',
+                    'ingredient_value': number,
+                }
+                for number in range(lines)
+            ]
+            for name, create in paths:
+                total, first_byte, peak, size = self.measure(
+                    create, ingredients_cart, options['repeat']
+                )
+                self.stdout.write(
+                    f'{lines:>6} {name:>8} {total * 1000:>10.1f} '
+                    f'{first_byte * 1000:>9.1f} {peak / 1024:>9.0f} '
+                    f'{size / 1024:>11.1f}'
+                )
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.jobs import (delete_expired_jobs, requeue_stale_jobs,
+                      run_shopping_cart_job)
+from recipes.models import ShoppingCartJob
+
+
+class Command(BaseCommand):
+    help = 'Выполнить задачи генерации списков покупок из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Обработать текущую очередь и завершить работу'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза между опросами очереди, в секундах'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale_jobs()
+            if requeued:
+                self.stdout.write(f'Возвращено в очередь задач: {requeued}')
+            deleted = delete_expired_jobs()
+            if deleted:
+                self.stdout.write(f'Удалено устаревших задач: {deleted}')
+            pending = ShoppingCartJob.objects.filter(
+                status=ShoppingCartJob.PENDING
+            ).values_list('pk', flat=True)
+            for job_id in pending:
+                run_shopping_cart_job(job_id)
+                self.stdout.write(f'Задача {job_id} обработана')
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,140 @@
+import threading
+import time
+from bisect import bisect_left
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+METHODS = frozenset(
+    ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS')
+)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Запрос к API выполнил больше SQL-запросов, чем заявлено во вью."""
+
+
+class QueryTimer:
+    """Обертка connection.execute_wrapper: считает запросы и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def escape(value):
+    return (
+        str(value).replace('\\', r'\\').replace('"', r'\"')
+        .replace('\n', r'\n')
+    )
+
+
+class Histogram:
+    """Гистограмма в памяти процесса в формате Prometheus.
+
+    Для каждого набора меток хранит число наблюдений по корзинам, сумму
+    и количество. В каждом процессе gunicorn гистограммы свои."""
+
+    def __init__(self, name, description, buckets, label_names):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.label_names = label_names
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 2)
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self):
+        yield f'# HELP {self.name} {self.description}'
+        yield f'# TYPE {self.name} histogram'
+        with self.lock:
+            series = sorted(
+                (labels, list(values))
+                for labels, values in self.series.items()
+            )
+        for labels, values in series:
+            labels = ','.join(
+                f'{name}="{escape(value)}"'
+                for name, value in zip(self.label_names, labels)
+            )
+            total = 0
+            for bucket, count in zip(self.buckets, values):
+                total += count
+                yield f'{self.name}_bucket{{{labels},le="{bucket}"}} {total}'
+            total += values[-2]
+            yield f'{self.name}_bucket{{{labels},le="+Inf"}} {total}'
+            yield f'{self.name}_sum{{{labels}}} {values[-1]:g}'
+            yield f'{self.name}_count{{{labels}}} {total}'
+
+    def clear(self):
+        with self.lock:
+            self.series.clear()
+
+
+LABELS = ('view', 'method')
+REQUEST_DURATION = Histogram(
+    'foodgram_request_duration_seconds',
+    'Время обработки запроса',
+    DURATION_BUCKETS, LABELS
+)
+DB_DURATION = Histogram(
+    'foodgram_request_db_duration_seconds',
+    'Время SQL-запросов за запрос',
+    DURATION_BUCKETS, LABELS
+)
+RENDERER_DURATION = Histogram(
+    'foodgram_request_renderer_duration_seconds',
+    'Время рендерера DRF: перевод готовых данных в байты ответа',
+    DURATION_BUCKETS, LABELS
+)
+QUERIES = Histogram(
+    'foodgram_request_queries',
+    'Количество SQL-запросов за запрос',
+    QUERY_BUCKETS, LABELS
+)
+HISTOGRAMS = (REQUEST_DURATION, DB_DURATION, RENDERER_DURATION, QUERIES)
+
+
+def render_metrics():
+    """Все гистограммы в текстовом формате Prometheus."""
+    return ''.join(
+        f'{line}\n'
+        for histogram in HISTOGRAMS for line in histogram.render()
+    )
+
+
+def get_labels(request):
+    """Метки запроса. Нестандартные методы сводятся к other, чтобы
+    клиенты не могли плодить ряды гистограмм."""
+    method = request.method if request.method in METHODS else 'other'
+    return request.resolver_match.view_name, method
+
+
+def get_query_budget(request):
+    """Бюджет SQL-запросов вью, обработавшей запрос.
+
+    Вью DRF объявляет query_budget числом или словарем
+    {действие: число}; для вьюсетов действие берется из маршрута."""
+    match = request.resolver_match
+    view = getattr(match, 'func', None)
+    budget = getattr(getattr(view, 'cls', None), 'query_budget', None)
+    if isinstance(budget, dict):
+        actions = getattr(view, 'actions', None) or {}
+        budget = budget.get(actions.get(request.method.lower()))
+    return budget
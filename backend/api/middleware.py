@@ -0,0 +1,86 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """Замеряет запросы к API: число и время SQL-запросов, время
+    рендерера DRF и общее время.
+
+    Результат пишется в заголовок Server-Timing и в гистограммы
+    api.metrics. Если вью объявляет query_budget и запрос его превысил,
+    в журнал пишется предупреждение, а при QUERY_BUDGET_STRICT
+    выбрасывается QueryBudgetExceeded, чтобы тесты падали.
+
+    Потоковые ответы (файл списка покупок) выполняют запросы уже при
+    отдаче содержимого, после выхода из middleware. Такие запросы
+    учитываются в гистограммах и бюджете после отдачи последнего куска,
+    а в Server-Timing, отправленный до содержимого, не попадают."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        timer = metrics.QueryTimer()
+        request.renderer_duration = 0
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={timer.duration * 1000:.1f};'
+            f'desc="{timer.count} queries"',
+            f'renderer;dur={request.renderer_duration * 1000:.1f}',
+            f'total;dur={duration * 1000:.1f}',
+        ))
+        match = request.resolver_match
+        if match is None or match.url_name == 'metrics':
+            return response
+        if response.streaming:
+            response.streaming_content = self.stream(
+                request, response.streaming_content, timer, start
+            )
+        else:
+            self.observe(request, timer, duration)
+        return response
+
+    def stream(self, request, content, timer, start):
+        """Отдает потоковый ответ, продолжая считать SQL-запросы,
+        и записывает метрики после последнего куска."""
+        with connection.execute_wrapper(timer):
+            yield from content
+        self.observe(request, timer, time.perf_counter() - start)
+
+    def observe(self, request, timer, duration):
+        labels = metrics.get_labels(request)
+        metrics.REQUEST_DURATION.observe(labels, duration)
+        metrics.DB_DURATION.observe(labels, timer.duration)
+        metrics.RENDERER_DURATION.observe(labels, request.renderer_duration)
+        metrics.QUERIES.observe(labels, timer.count)
+        budget = metrics.get_query_budget(request)
+        if budget is not None and timer.count > budget:
+            message = (
+                f'{request.method} {request.path}: {timer.count} '
+                f'SQL-запросов при бюджете {budget}'
+            )
+            if settings.QUERY_BUDGET_STRICT:
+                raise metrics.QueryBudgetExceeded(message)
+            logger.warning(message)
+
+    def process_template_response(self, request, response):
+        """Ответы DRF отрисовываются рендерером после вью, когда данные
+        уже сериализованы: время рендерера засекается отсюда до
+        post-render callback."""
+        start = time.perf_counter()
+
+        def rendered(response):
+            request.renderer_duration = time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
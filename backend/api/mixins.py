@@ -0,0 +1,114 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from recipes.cache import get_versions
+
+
+def get_etag(content):
+    return '"{}"'.format(hashlib.md5(content).hexdigest())
+
+
+class ResponseCacheMixin:
+    """Кэширует готовые JSON-ответы list и retrieve.
+
+    Ответы хранятся байтами под версиями пространств имен
+    cache_namespaces, которые сигналы меняют при сохранении и удалении
+    объектов. С общим кэшем (SHARED_CACHE) эти же версии служат ETag
+    и Last-Modified, поэтому браузеры получают 304 без обращения к базе
+    и сериализаторам. В кэше процесса версии у каждого процесса свои
+    и могут отставать от чужих изменений, поэтому ETag считается по
+    содержимому ответа. Если ответ зависит от пользователя,
+    cache_anonymous_only ограничивает кэш анонимными запросами."""
+
+    cache_namespaces = ()
+    cache_anonymous_only = False
+    cache_timeout = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request, super().retrieve, *args, **kwargs
+        )
+
+    def get_cache_key(self, request, versions):
+        """Ответы содержат абсолютные ссылки на изображения, поэтому
+        схема и хост входят в ключ."""
+        params = urlencode(sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        ))
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        namespaces = ','.join(
+            f'{namespace}:{version}'
+            for namespace, version in zip(self.cache_namespaces, versions)
+        )
+        return (
+            f'response:{self.basename}:{namespaces}:'
+            f'{request.scheme}://{request.get_host()}:'
+            f'{self.action}:{lookup}:{params}'
+        )
+
+    def is_cacheable(self, request):
+        return isinstance(request.accepted_renderer, JSONRenderer) and not (
+            self.cache_anonymous_only and request.user.is_authenticated
+        )
+
+    def get_cached_response(self, request, view, *args, **kwargs):
+        if not self.is_cacheable(request):
+            return view(request, *args, **kwargs)
+        versions = get_versions(*self.cache_namespaces)
+        key = self.get_cache_key(request, versions)
+        etag = last_modified = response = None
+        if settings.SHARED_CACHE:
+            etag = get_etag(key.encode())
+            last_modified = max(versions) // 10 ** 9
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+        if response is None:
+            response = self.get_cached_content(request, view, key, *args,
+                                               **kwargs)
+            if etag is None and response.status_code == status.HTTP_200_OK:
+                etag = get_etag(response.content)
+                response = get_conditional_response(
+                    request, etag=etag, response=response
+                )
+        if response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+        ):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            if self.cache_anonymous_only:
+                patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def get_cached_content(self, request, view, key, *args, **kwargs):
+        content = cache.get(key)
+        if content is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            content = request.accepted_renderer.render(
+                response.data,
+                request.accepted_media_type,
+                self.get_renderer_context()
+            )
+            timeout = self.cache_timeout
+            if timeout is None:
+                timeout = settings.CATALOG_CACHE_TIMEOUT
+            cache.set(key, content, timeout)
+        return HttpResponse(content, content_type='application/json')
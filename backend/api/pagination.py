@@ -1,7 +1,74 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework import serializers
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from django.conf import settings
 
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size = settings.PAGE_SIZE
     page_size_query_param = 'limit'
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Курсорная пагинация ленты рецептов без OFFSET и COUNT(*)."""
+
+    page_size = settings.PAGE_SIZE
+    page_size_query_param = 'limit'
+    ordering = ('-pub_date', '-id')
+
+
+class FeedCursorPagination(CursorPagination):
+    """Курсорная пагинация ленты подписок по индексу записей ленты."""
+
+    page_size = settings.PAGE_SIZE
+    page_size_query_param = 'limit'
+    ordering = ('-pub_date', '-recipe_id')
+
+
+class UserCursorPagination(CursorPagination):
+    """Курсорная пагинация пользователей и подписок."""
+
+    page_size = settings.PAGE_SIZE
+    page_size_query_param = 'limit'
+    ordering = ('username',)
+
+
+class CursorPaginationMixin:
+    """Включает курсорную пагинацию по параметру pagination=cursor.
+
+    Без параметра вьюсет использует pagination_class, поэтому прежний
+    контракт page/limit сохраняется. Курсор упорядочивает выдачу по
+    полям ordering класса пагинации, поэтому с параметрами
+    cursor_incompatible_params и действиями cursor_incompatible_actions,
+    которые задают свой порядок, запрос отклоняется с ошибкой 400."""
+
+    cursor_pagination_class = None
+    cursor_incompatible_params = ()
+    cursor_incompatible_actions = ()
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if (params.get('pagination') == 'cursor'
+                    or CursorPagination.cursor_query_param in params):
+                self.check_cursor_pagination(params)
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def check_cursor_pagination(self, params):
+        conflicts = [
+            param for param in self.cursor_incompatible_params
+            if params.get(param)
+        ]
+        if self.action in self.cursor_incompatible_actions:
+            conflicts.append(self.action)
+        if conflicts:
+            raise serializers.ValidationError({
+                'pagination': (
+                    'Курсорная пагинация не сохраняет порядок выдачи '
+                    f'для {", ".join(conflicts)}: используйте page '
+                    f'и limit.'
+                )
+            })
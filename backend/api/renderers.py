@@ -0,0 +1,135 @@
+import csv
+import json
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.module_loading import import_string
+from rest_framework import renderers
+
+from .utils_shopping_cart_pdf import create_shopping_cart
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+class ShoppingCartRenderer(ABC, renderers.BaseRenderer):
+    """Базовый рендерер списка покупок.
+
+    Наследники описывают формат через media_type и format и реализуют
+    get_response(), который строит файл из выборки
+    get_shopping_cart_ingredients."""
+
+    charset = 'utf-8'
+    filename = 'shopping_cart'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Отображает ответы об ошибках в виде JSON."""
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = 'application/json'
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+    @abstractmethod
+    def get_response(self, ingredients_cart):
+        """Ответ с файлом списка покупок."""
+
+
+class StreamingShoppingCartRenderer(ShoppingCartRenderer):
+    """Рендерер, который построчно отдает файл из stream()."""
+
+    @abstractmethod
+    def stream(self, ingredients_cart):
+        """Строки файла списка покупок."""
+
+    def get_response(self, ingredients_cart):
+        content_type = self.media_type
+        if self.charset:
+            content_type = f'{content_type}; charset={self.charset}'
+        response = StreamingHttpResponse(
+            (
+                line.encode(self.charset)
+                for line in self.stream(ingredients_cart)
+            ),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{self.filename}.{self.format}"'
+        )
+        return response
+
+
+class ShoppingCartPDFRenderer(ShoppingCartRenderer):
+    """Список покупок в PDF."""
+
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+
+    def get_response(self, ingredients_cart):
+        return create_shopping_cart(ingredients_cart)
+
+
+class ShoppingCartTextRenderer(StreamingShoppingCartRenderer):
+    """Список покупок обычным текстом."""
+
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, ingredients_cart):
+        yield 'Список покупок.\n'
+        for number, ingredient in enumerate(ingredients_cart, start=1):
+            yield (
+                f"{number}. {ingredient['ingredient__name']}: "
+                f"{ingredient['ingredient_value']} "
+                f"{ingredient['ingredient__measurement_unit']}.\n"
+            )
+
+
+class ShoppingCartCSVRenderer(StreamingShoppingCartRenderer):
+    """Список покупок в CSV."""
+
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, ingredients_cart):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('name', 'measurement_unit', 'amount'))
+        for ingredient in ingredients_cart:
+            yield writer.writerow((
+                ingredient['ingredient__name'],
+                ingredient['ingredient__measurement_unit'],
+                ingredient['ingredient_value'],
+            ))
+
+
+class ShoppingCartJSONRenderer(StreamingShoppingCartRenderer):
+    """Список покупок в JSON."""
+
+    media_type = 'application/json'
+    format = 'json'
+
+    def stream(self, ingredients_cart):
+        separator = '['
+        for ingredient in ingredients_cart:
+            yield separator + json.dumps({
+                'name': ingredient['ingredient__name'],
+                'measurement_unit': ingredient['ingredient__measurement_unit'],
+                'amount': ingredient['ingredient_value'],
+            }, ensure_ascii=False)
+            separator = ','
+        yield ']' if separator == ',' else '[]'
+
+
+def get_shopping_cart_renderers():
+    """Возвращает рендереры списка покупок из настроек проекта.
+
+    Первый рендерер используется по умолчанию."""
+    return [
+        import_string(renderer)
+        for renderer in settings.SHOPPING_CART_RENDERERS
+    ]
@@ -1,8 +1,9 @@
 from .recipes import (FavoriteSerializer, IngredientAmountSerializer,
                       IngredientFullSerializer, IngredientSerializer,
-                      RecipeGETSerializer, RecipeSerializer,
-                      RecipeShortSerializer, ShoppingCartSerializer,
-                      TagSerializer)
+                      RecipeDiscoverySerializer, RecipeGETSerializer,
+                      RecipeSerializer,
+                      RecipeShortSerializer, ShoppingCartJobSerializer,
+                      ShoppingCartSerializer, TagSerializer)
 from .users import (CustomUserCreateSerializer, CustomUserSerializer,
                     SubscriptionRecipeShortSerializer, SubscriptionSerializer,
                     SubscriptionShowSerializer)
@@ -14,9 +15,11 @@ __all__ = [
     IngredientAmountSerializer,
     IngredientFullSerializer,
     IngredientSerializer,
+    RecipeDiscoverySerializer,
     RecipeGETSerializer,
     RecipeSerializer,
     RecipeShortSerializer,
+    ShoppingCartJobSerializer,
     ShoppingCartSerializer,
     SubscriptionSerializer,
     SubscriptionRecipeShortSerializer,
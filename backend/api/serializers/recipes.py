@@ -1,11 +1,18 @@
+import hashlib
+import os
+
 from django.db import transaction
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from django.conf import settings
 
+from recipes import shopping_list
 from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
-                            ShoppingCart, Tag)
+                            ShoppingCart, ShoppingCartJob, Tag)
+from recipes.search import update_search_index
 
+from ..fields import ImageSrcsetField, RecipeImageField
+from ..renderers import get_shopping_cart_renderers
+from ..viewer_state import get_viewer_state
 from .users import CustomUserSerializer
 
 
@@ -62,6 +69,7 @@ class RecipeGETSerializer(serializers.ModelSerializer):
     ingredients = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField(read_only=True)
     is_in_shopping_cart = serializers.SerializerMethodField(read_only=True)
+    srcset = ImageSrcsetField()
 
     class Meta:
         model = Recipe
@@ -74,33 +82,35 @@ class RecipeGETSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'srcset',
             'text',
             'cooking_time'
         )
 
     def get_ingredients(self, object):
         """Получает ингредиенты из модели IngredientAmount."""
-        ingredients = IngredientAmount.objects.filter(recipe=object)
+        ingredients = object.ingredientamount_set.all()
         return IngredientFullSerializer(ingredients, many=True).data
 
     def get_is_favorited(self, object):
         """Проверяет, добавил ли текущий пользователь рецепт в избанное."""
-        request = self.context.get('request')
-        return (request and request.user.is_authenticated
-                and request.user.favorites.filter(recipe=object).exists())
+        viewer_state = get_viewer_state(self.context)
+        return bool(viewer_state) and object.pk in viewer_state.favorited
 
     def get_is_in_shopping_cart(self, object):
         """Проверяет, добавил ли текущий пользователь
         рецепт в список покупок."""
-        request = self.context.get('request')
-        return (request and request.user.is_authenticated
-                and request.user.shopping_list.filter(recipe=object).exists())
+        viewer_state = get_viewer_state(self.context)
+        return (
+            bool(viewer_state)
+            and object.pk in viewer_state.in_shopping_cart
+        )
 
 
 class RecipeSerializer(serializers.ModelSerializer):
     """Сериализатор объектов класса Recipe при небезопасных запросах."""
     ingredients = IngredientAmountSerializer(many=True)
-    image = Base64ImageField(max_length=None)
+    image = RecipeImageField(max_length=None)
     author = CustomUserSerializer(read_only=True)
 
     class Meta:
@@ -165,35 +175,108 @@ class RecipeSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=author, **validated_data)
         recipe.tags.set(tags_data)
         self.add_ingredients(ingredients_data, recipe)
+        update_search_index([recipe.pk])
         return recipe
 
+    @staticmethod
+    def update_tags(recipe, tags_data):
+        """Добавляет и удаляет только изменившиеся теги."""
+        current = set(recipe.tags.values_list('pk', flat=True))
+        new = {tag.pk for tag in tags_data}
+        if current - new:
+            recipe.tags.remove(*(current - new))
+        if new - current:
+            recipe.tags.add(*(new - current))
+
+    @staticmethod
+    def update_ingredients(recipe, ingredients_data):
+        """Применяет к составу рецепта только отличия от сохраненного:
+        удаляет лишние ингредиенты, обновляет количества и добавляет
+        новые."""
+        current = {
+            amount.ingredient_id: amount
+            for amount in IngredientAmount.objects.filter(recipe=recipe)
+        }
+        old_amounts = {
+            ingredient_id: amount.amount
+            for ingredient_id, amount in current.items()
+        }
+        new_amounts = {
+            ingredient.get('id').pk: ingredient.get('amount')
+            for ingredient in ingredients_data
+        }
+        removed = [
+            amount.pk for ingredient_id, amount in current.items()
+            if ingredient_id not in new_amounts
+        ]
+        changed = []
+        created = []
+        for ingredient_id, value in new_amounts.items():
+            amount = current.get(ingredient_id)
+            if amount is None:
+                created.append(IngredientAmount(
+                    ingredient_id=ingredient_id,
+                    recipe=recipe,
+                    amount=value
+                ))
+            elif amount.amount != value:
+                amount.amount = value
+                changed.append(amount)
+        if removed:
+            IngredientAmount.objects.filter(pk__in=removed).delete()
+        IngredientAmount.objects.bulk_update(changed, ('amount',))
+        IngredientAmount.objects.bulk_create(created)
+        shopping_list.change_recipe(recipe.pk, old_amounts, new_amounts)
+
+    @staticmethod
+    def is_same_image(stored, uploaded):
+        """Сравнивает загруженное изображение с сохраненным по имени,
+        построенному из хеша содержимого, затем по размеру и хешу."""
+        if stored and os.path.basename(stored.name) == uploaded.name:
+            return True
+        try:
+            if not stored or stored.size != uploaded.size:
+                return False
+            digests = []
+            for image in (stored, uploaded):
+                digest = hashlib.sha256()
+                for chunk in image.chunks():
+                    digest.update(chunk)
+                digests.append(digest.digest())
+        except OSError:
+            return False
+        finally:
+            stored.close()
+        return digests[0] == digests[1]
+
     @transaction.atomic
     def update(self, instance, validated_data):
-        instance.tags.clear()
-        instance.ingredients.clear()
-        tags_data = validated_data.pop('tags')
-        instance.tags.set(tags_data)
-        ingredients_data = validated_data.pop('ingredients')
-        IngredientAmount.objects.filter(recipe=instance).delete()
-        self.add_ingredients(ingredients_data, instance)
-        return super().update(instance, validated_data)
+        self.update_tags(instance, validated_data.pop('tags'))
+        self.update_ingredients(instance, validated_data.pop('ingredients'))
+        image = validated_data.get('image')
+        if image is not None and self.is_same_image(instance.image, image):
+            validated_data.pop('image')
+        instance = super().update(instance, validated_data)
+        update_search_index([instance.pk])
+        return instance
 
     def to_representation(self, instance):
         """Определяет какой сериализатор будет использоваться для чтения."""
-        return RecipeGETSerializer(instance, context={
-            'request': self.context.get('request')
-        }).data
+        return RecipeGETSerializer(instance, context=self.context).data
 
 
 class RecipeShortSerializer(serializers.ModelSerializer):
     """Сериализатор для компактного отображения рецептов."""
 
+    srcset = ImageSrcsetField()
+
     class Meta:
         model = Recipe
         fields = (
             'id',
             'name',
             'image',
+            'srcset',
             'cooking_time'
         )
 
@@ -240,3 +323,48 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
             instance.recipe,
             context={'request': self.context.get('request')}
         ).data
+
+
+class ShoppingCartJobSerializer(serializers.ModelSerializer):
+    """Сериализатор для модели ShoppingCartJob."""
+
+    format = serializers.ChoiceField(
+        choices=[
+            renderer.format for renderer in get_shopping_cart_renderers()
+        ],
+        default=get_shopping_cart_renderers()[0].format
+    )
+
+    class Meta:
+        model = ShoppingCartJob
+        fields = ('id', 'format', 'status', 'created')
+        read_only_fields = ('status', 'created')
+
+
+class RecipeDiscoverySerializer(serializers.Serializer):
+    """Параметры подбора рецептов по ингредиентам."""
+
+    ingredients = serializers.CharField()
+    match = serializers.ChoiceField(
+        choices=('all', 'any', 'best'),
+        default='best'
+    )
+
+    def validate_ingredients(self, value):
+        """Разбирает список id ингредиентов через запятую."""
+        try:
+            ingredients = {int(pk) for pk in value.split(',') if pk.strip()}
+        except ValueError:
+            raise serializers.ValidationError(
+                'Укажите id ингредиентов через запятую'
+            )
+        if not ingredients:
+            raise serializers.ValidationError(
+                'Укажите хотя бы один ингредиент'
+            )
+        if len(ingredients) > settings.RECIPE_DISCOVERY_MAX_INGREDIENTS:
+            raise serializers.ValidationError(
+                'Можно указать не больше '
+                f'{settings.RECIPE_DISCOVERY_MAX_INGREDIENTS} ингредиентов'
+            )
+        return ingredients
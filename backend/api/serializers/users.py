@@ -5,6 +5,9 @@ from rest_framework.validators import UniqueTogetherValidator
 from recipes.models import Recipe
 from users.models import Subscription, User
 
+from ..fields import ImageSrcsetField
+from ..viewer_state import get_viewer_state
+
 
 class CustomUserCreateSerializer(UserCreateSerializer):
     """Сериализатор для создания объекта класса User."""
@@ -40,9 +43,10 @@ class CustomUserSerializer(UserSerializer):
 
     def get_is_subscribed(self, author):
         """Проверяет, подписан ли текущий пользователь на автора аккаунта."""
-        request = self.context.get('request')
-        return (request and request.user.is_authenticated
-                and request.user.subscriber.filter(subscriber=author).exists())
+        if hasattr(author, 'is_subscribed'):
+            return author.is_subscribed
+        viewer_state = get_viewer_state(self.context)
+        return bool(viewer_state) and author.pk in viewer_state.subscribed
 
 
 class SubscriptionSerializer(serializers.ModelSerializer):
@@ -71,12 +75,15 @@ class SubscriptionSerializer(serializers.ModelSerializer):
 class SubscriptionRecipeShortSerializer(serializers.ModelSerializer):
     """Сериализатор для отображения рецептов в подписке."""
 
+    srcset = ImageSrcsetField()
+
     class Meta:
         model = Recipe
         fields = (
             'id',
             'name',
             'image',
+            'srcset',
             'cooking_time'
         )
 
@@ -102,11 +109,14 @@ class SubscriptionShowSerializer(CustomUserSerializer):
 
     def get_recipes(self, object):
         """Получаем репепты"""
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        recipes = object.recipes.all()
-        if limit:
-            recipes = recipes[:int(limit)]
+        if hasattr(object, 'limited_recipes'):
+            recipes = object.limited_recipes
+        else:
+            request = self.context.get('request')
+            limit = request.GET.get('recipes_limit')
+            recipes = object.recipes.all()
+            if limit:
+                recipes = recipes[:int(limit)]
         return SubscriptionRecipeShortSerializer(
             recipes,
             many=True,
@@ -115,4 +125,4 @@ class SubscriptionShowSerializer(CustomUserSerializer):
 
     def get_recipes_count(self, object):
         """Получаем количество рецептов"""
-        return object.recipes.count()
+        return object.recipes_count
@@ -0,0 +1,146 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.cache import bump_version_on_commit
+from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                            ShoppingCart, Tag)
+from users.models import Subscription, User
+
+from .indexes import recipe_ingredient_changes, recipe_tag_changes
+from .utils_shopping_cart import bump_shopping_cart_version
+from .viewer_state import get_viewer_namespace
+
+AUTHOR_EXCLUDED_FIELDS = {'last_login', 'password'}
+
+
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    """Рецепт добавлен в список покупок или удален из него."""
+    bump_shopping_cart_version(pk=instance.user_id)
+
+
+@receiver(post_save, sender=IngredientAmount)
+@receiver(post_delete, sender=IngredientAmount)
+def ingredient_amount_changed(sender, instance, **kwargs):
+    """Изменился состав рецепта, который может быть в списке покупок."""
+    bump_shopping_cart_version(shopping_list__recipe=instance.recipe_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_changed(sender, instance, created, **kwargs):
+    """Изменен рецепт: RecipeSerializer.update пересоздает ингредиенты
+    пакетно, без сигналов, и сохраняет рецепт последним."""
+    if not created:
+        bump_shopping_cart_version(shopping_list__recipe=instance.pk)
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    """Изменились название или единица измерения ингредиента."""
+    if not created:
+        bump_shopping_cart_version(
+            shopping_list__recipe__ingredients=instance.pk
+        )
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_catalog_changed(sender, instance, **kwargs):
+    """Изменился каталог ингредиентов."""
+    bump_version_on_commit('ingredients')
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_catalog_changed(sender, instance, **kwargs):
+    """Изменился каталог тегов."""
+    bump_version_on_commit('tags')
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=IngredientAmount)
+@receiver(post_delete, sender=IngredientAmount)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_catalog_changed(sender, **kwargs):
+    """Изменились рецепты, их ингредиенты или теги.
+
+    Пакетные изменения ингредиентов в RecipeSerializer проходят без
+    сигналов, но всегда вместе с сохранением рецепта в той же
+    транзакции."""
+    if kwargs.get('action', 'post_').startswith('post_'):
+        bump_version_on_commit('recipes')
+
+
+@receiver(post_save, sender=User)
+def recipe_author_changed(sender, instance, created, update_fields,
+                          **kwargs):
+    """Данные автора входят в ответы с рецептами. Сохранение одного
+    last_login при входе кэш не сбрасывает."""
+    if not created and not (
+        update_fields and set(update_fields) <= AUTHOR_EXCLUDED_FIELDS
+    ):
+        bump_version_on_commit('recipes')
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def viewer_recipes_changed(sender, instance, **kwargs):
+    """Изменились избранное или список покупок пользователя."""
+    bump_version_on_commit(get_viewer_namespace(instance.user_id))
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def viewer_subscriptions_changed(sender, instance, **kwargs):
+    """Изменились подписки пользователя."""
+    bump_version_on_commit(get_viewer_namespace(instance.subscriber_id))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=IngredientAmount)
+@receiver(post_delete, sender=IngredientAmount)
+def recipe_ingredients_changed(sender, instance, **kwargs):
+    """Записывает рецепт в журнал изменений индекса ингредиентов.
+
+    Сохранение рецепта тоже учитывается: ингредиенты RecipeSerializer
+    пишет пакетно, без сигналов."""
+    recipe_id = instance.pk if sender is Recipe else instance.recipe_id
+    transaction.on_commit(
+        lambda: recipe_ingredient_changes.record(recipe_id)
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_tags_deleted(sender, instance, **kwargs):
+    """Связи удаленного рецепта с тегами удаляются без m2m_changed."""
+    recipe_id = instance.pk
+    transaction.on_commit(lambda: recipe_tag_changes.record(recipe_id))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    """Записывает рецепты с изменившимися тегами в журнал индекса тегов.
+
+    Изменения со стороны тега без списка рецептов перестраивают индекс
+    через версию каталога тегов."""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        recipe_ids = {instance.pk}
+    elif pk_set:
+        recipe_ids = pk_set
+    else:
+        return bump_version_on_commit('tags')
+
+    def record():
+        for recipe_id in recipe_ids:
+            recipe_tag_changes.record(recipe_id)
+
+    transaction.on_commit(record)
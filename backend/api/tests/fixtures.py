@@ -0,0 +1,231 @@
+import base64
+import io
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.test import Client
+from django.utils import timezone
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from api.indexes import reset_indexes
+from recipes import shopping_list, timeline
+from recipes.counters import recount
+from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                            ShoppingCart, Tag)
+from recipes.search import update_search_index
+from users.models import Subscription, User
+
+# Кэш процесса вместо настроенного: clear_caches очищает кэш целиком,
+# и общий Redis при замерах и тестах не должен пострадать.
+LOCAL_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api-fixtures',
+    }
+}
+WORDS = (
+    'борщ', 'салат', 'пирог', 'суп', 'каша', 'рагу', 'омлет', 'плов',
+    'запеканка', 'блины', 'котлеты', 'соус', 'томатный', 'грибной',
+    'куриный', 'овощной', 'сырный', 'яблочный', 'острый', 'домашний',
+)
+BATCH_SIZE = 1000
+
+
+def bulk_create(model, objects):
+    """Вставляет объекты из генератора пачками по BATCH_SIZE."""
+    objects = iter(objects)
+    while batch := list(islice(objects, BATCH_SIZE)):
+        model.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def seed(rng, options):
+    """Заполняет базу синтетическими данными массовыми вставками
+    и пересчитывает производные данные, которые обычно ведут сигналы."""
+    password = make_password('benchmark')
+    bulk_create(User, (
+        User(
+            username=f'user{number}',
+            email=f'user{number}@benchmark.ru',
+            first_name='Имя',
+            last_name='Фамилия',
+            password=password
+        )
+        for number in range(options['users'])
+    ))
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    bulk_create(Tag, (
+        Tag(name=f'тег {number}', slug=f'tag{number}', color=f'#{number:06X}')
+        for number in range(options['tags'])
+    ))
+    tag_ids = list(Tag.objects.values_list('pk', flat=True))
+    bulk_create(Ingredient, (
+        Ingredient(
+            name=f'{rng.choice(WORDS)} {number}', measurement_unit='г'
+        )
+        for number in range(options['ingredients'])
+    ))
+    ingredient_ids = list(Ingredient.objects.values_list('pk', flat=True))
+    bulk_create(Recipe, (
+        Recipe(
+            author_id=rng.choice(user_ids),
+            name=f'{rng.choice(WORDS)} {rng.choice(WORDS)} {number}',
+            text=' '.join(rng.choices(WORDS, k=30)),
+            cooking_time=rng.randint(1, 180),
+            image='recipes/images/benchmark.png'
+        )
+        for number in range(options['recipes'])
+    ))
+    recipe_ids = list(Recipe.objects.order_by('pk').values_list(
+        'pk', flat=True
+    ))
+    now = timezone.now()
+    Recipe.objects.bulk_update(
+        [
+            Recipe(pk=pk, pub_date=now - timedelta(minutes=age))
+            for age, pk in enumerate(reversed(recipe_ids))
+        ],
+        ('pub_date',),
+        batch_size=BATCH_SIZE // 2
+    )
+    per_recipe = min(options['ingredients_per_recipe'], len(ingredient_ids))
+    bulk_create(IngredientAmount, (
+        IngredientAmount(
+            recipe_id=recipe_id,
+            ingredient_id=ingredient_id,
+            amount=rng.randint(1, 500)
+        )
+        for recipe_id in recipe_ids
+        for ingredient_id in rng.sample(ingredient_ids, per_recipe)
+    ))
+    bulk_create(Recipe.tags.through, (
+        Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+        for recipe_id in recipe_ids
+        for tag_id in rng.sample(tag_ids, min(len(tag_ids), 2))
+    ))
+    subscriptions = min(options['subscriptions'], len(user_ids) - 1)
+    bulk_create(Subscription, (
+        Subscription(subscriber_id=user_id, author_id=author_id)
+        for user_id in user_ids
+        for author_id in [
+            author_id
+            for author_id in rng.sample(user_ids, subscriptions + 1)
+            if author_id != user_id
+        ][:subscriptions]
+    ))
+    for model, density in (
+        (Favorite, options['favorites']),
+        (ShoppingCart, options['cart']),
+    ):
+        bulk_create(model, (
+            model(user_id=user_id, recipe_id=recipe_id)
+            for user_id in user_ids
+            for recipe_id in rng.sample(
+                recipe_ids, min(density, len(recipe_ids))
+            )
+        ))
+    recount()
+    shopping_list.rebuild()
+    timeline.rebuild()
+    update_search_index()
+    clear_caches()
+    return user_ids, recipe_ids, ingredient_ids
+
+
+def clear_caches():
+    """Очищает кэш и индексы процесса, как при холодном старте."""
+    cache.clear()
+    reset_indexes()
+
+
+def get_routes(rng, recipe_ids, ingredient_ids):
+    """Маршруты api/urls.py: (название, с токеном, адрес)."""
+    recipe = Recipe.objects.get(pk=rng.choice(recipe_ids))
+    slugs = '&'.join(
+        f'tags={slug}'
+        for slug in Tag.objects.values_list('slug', flat=True)[:2]
+    )
+    ingredients = ','.join(
+        str(pk)
+        for pk in rng.sample(ingredient_ids, min(3, len(ingredient_ids)))
+    )
+    return (
+        ('recipes', False, '/api/recipes/'),
+        ('recipes_auth', True, '/api/recipes/'),
+        ('recipes_cursor', True, '/api/recipes/?pagination=cursor'),
+        ('recipes_page_10', True, '/api/recipes/?page=10'),
+        ('recipes_tags', True, f'/api/recipes/?{slugs}'),
+        ('recipes_author', True, f'/api/recipes/?author={recipe.author_id}'),
+        ('recipes_favorited', True, '/api/recipes/?is_favorited=1'),
+        ('recipes_shopping_cart', True,
+         '/api/recipes/?is_in_shopping_cart=1'),
+        ('recipes_popular', True, '/api/recipes/?ordering=popular'),
+        ('recipes_search', True, f'/api/recipes/?search={WORDS[0]}'),
+        ('recipe_detail', True, f'/api/recipes/{recipe.pk}/'),
+        ('recipes_discover', True,
+         f'/api/recipes/discover/?ingredients={ingredients}'),
+        ('recipes_feed', True, '/api/recipes/feed/'),
+        ('users', True, '/api/users/'),
+        ('user_detail', True, f'/api/users/{recipe.author_id}/'),
+        ('users_me', True, '/api/users/me/'),
+        ('subscriptions', True, '/api/users/subscriptions/'),
+        ('tags', False, '/api/tags/'),
+        ('ingredients_search', False, f'/api/ingredients/?name={WORDS[1]}'),
+        ('download_shopping_cart', True,
+         '/api/recipes/download_shopping_cart/'),
+        ('download_shopping_cart_csv', True,
+         '/api/recipes/download_shopping_cart/?format=csv'),
+    )
+
+
+def get(client, path):
+    """Выполняет запрос и дочитывает потоковый ответ."""
+    response = client.get(path)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def create_user(number):
+    return User.objects.create_user(
+        username=f'user{number}',
+        email=f'user{number}@foodgram.ru',
+        password='password',
+        first_name='Имя',
+        last_name='Фамилия'
+    )
+
+
+def get_client(user):
+    """Клиент с токеном пользователя."""
+    token, _ = Token.objects.get_or_create(user=user)
+    return Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+
+def create_recipe(author, name, ingredients=(), text='Описание', **fields):
+    """Создает рецепт с ингредиентами [(ингредиент, количество)]
+    и добавляет его в поисковый индекс, как сериализатор."""
+    recipe = Recipe.objects.create(
+        author=author,
+        name=name,
+        text=text,
+        cooking_time=fields.pop('cooking_time', 10),
+        image=fields.pop('image', 'recipes/benchmark.png'),
+        **fields
+    )
+    IngredientAmount.objects.bulk_create(
+        IngredientAmount(recipe=recipe, ingredient=ingredient, amount=amount)
+        for ingredient, amount in ingredients
+    )
+    update_search_index([recipe.pk])
+    return recipe
+
+
+def get_image(size=(8, 8), format='PNG'):
+    """Изображение в виде data URI с base64, как его шлет фронтенд."""
+    content = io.BytesIO()
+    Image.new('RGB', size, (200, 80, 40)).save(content, format=format)
+    encoded = base64.b64encode(content.getvalue()).decode()
+    return f'data:image/{format.lower()};base64,{encoded}'
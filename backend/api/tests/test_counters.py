@@ -0,0 +1,72 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from recipes.models import Recipe
+from users.models import User
+
+from .fixtures import (LOCAL_CACHES, clear_caches, create_recipe,
+                       create_user, get_client)
+
+
+@override_settings(CACHES=LOCAL_CACHES, BACKGROUND_WORKERS=0)
+class CounterTests(TestCase):
+    """Счетчики рецептов и пользователей ведутся сигналами
+    и совпадают с пересчетом по базе."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.author = create_user(0), create_user(1)
+        cls.old = create_recipe(cls.author, 'Старый')
+        cls.new = create_recipe(cls.author, 'Новый')
+
+    def setUp(self):
+        clear_caches()
+        self.client = get_client(self.user)
+
+    def assert_counters(self, favorites, shopping_cart, subscribers):
+        recipe = Recipe.objects.get(pk=self.old.pk)
+        author = User.objects.get(pk=self.author.pk)
+        self.assertEqual(recipe.favorites_count, favorites)
+        self.assertEqual(recipe.shopping_cart_count, shopping_cart)
+        self.assertEqual(author.subscribers_count, subscribers)
+        self.assertEqual(author.recipes_count, 2)
+
+    def test_counters_follow_api(self):
+        self.assert_counters(0, 0, 0)
+        for action in ('favorite', 'shopping_cart'):
+            response = self.client.post(
+                f'/api/recipes/{self.old.pk}/{action}/'
+            )
+            self.assertEqual(response.status_code, 201)
+        response = self.client.post(
+            f'/api/users/{self.author.pk}/subscribe/'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assert_counters(1, 1, 1)
+        response = self.client.get('/api/users/subscriptions/')
+        self.assertEqual(response.json()['results'][0]['recipes_count'], 2)
+        self.client.delete(f'/api/recipes/{self.old.pk}/favorite/')
+        self.client.delete(f'/api/users/{self.author.pk}/subscribe/')
+        self.assert_counters(0, 1, 0)
+
+    def test_popular_ordering(self):
+        response = self.client.get('/api/recipes/?ordering=popular')
+        self.assertEqual(
+            [recipe['id'] for recipe in response.json()['results']],
+            [self.new.pk, self.old.pk]
+        )
+        self.client.post(f'/api/recipes/{self.old.pk}/favorite/')
+        response = self.client.get('/api/recipes/?ordering=popular')
+        self.assertEqual(
+            [recipe['id'] for recipe in response.json()['results']],
+            [self.old.pk, self.new.pk]
+        )
+
+    def test_recount(self):
+        self.client.post(f'/api/recipes/{self.old.pk}/favorite/')
+        Recipe.objects.update(favorites_count=5, shopping_cart_count=5)
+        User.objects.update(recipes_count=0)
+        call_command('recount_counters', stdout=StringIO())
+        self.assert_counters(1, 0, 0)
@@ -0,0 +1,74 @@
+from django.test import TestCase, override_settings
+
+from recipes.models import FeedEntry
+
+from .fixtures import (LOCAL_CACHES, clear_caches, create_recipe,
+                       create_user, get_client)
+
+
+@override_settings(CACHES=LOCAL_CACHES, BACKGROUND_WORKERS=0)
+class FeedTests(TestCase):
+    """Лента подписок: рассылка новых рецептов, добор при чтении
+    и очистка после отписки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.author, cls.other = (
+            create_user(number) for number in range(3)
+        )
+        cls.old = create_recipe(cls.author, 'Старый')
+        create_recipe(cls.other, 'Чужой')
+
+    def setUp(self):
+        clear_caches()
+        self.client = get_client(self.user)
+        response = self.client.post(
+            f'/api/users/{self.author.pk}/subscribe/'
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def get_feed(self, limit=1):
+        """Id рецептов ленты, прочитанной постранично по курсору."""
+        recipe_ids = []
+        url = f'/api/recipes/feed/?limit={limit}'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            recipe_ids += [
+                recipe['id'] for recipe in response.json()['results']
+            ]
+            url = response.json()['next']
+        return recipe_ids
+
+    def test_subscription_backfills_feed(self):
+        self.assertEqual(self.get_feed(), [self.old.pk])
+
+    def test_new_recipe_is_fanned_out(self):
+        new = create_recipe(self.author, 'Новый')
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.user, recipe=new).exists()
+        )
+        self.assertEqual(self.get_feed(), [new.pk, self.old.pk])
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_recipe_without_fanout_is_pulled(self):
+        self.get_feed()
+        new = create_recipe(self.author, 'Новый')
+        self.assertFalse(FeedEntry.objects.filter(recipe=new).exists())
+        self.assertEqual(self.get_feed(), [new.pk, self.old.pk])
+
+    def test_lost_fanout_entry_is_reconciled(self):
+        self.get_feed()
+        new = create_recipe(self.author, 'Новый')
+        FeedEntry.objects.filter(recipe=new).delete()
+        self.assertEqual(self.get_feed(), [new.pk, self.old.pk])
+
+    def test_unsubscribe_trims_feed(self):
+        response = self.client.delete(
+            f'/api/users/{self.author.pk}/subscribe/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(
+            FeedEntry.objects.filter(user=self.user).exists()
+        )
+        self.assertEqual(self.get_feed(), [])
@@ -0,0 +1,75 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from recipes.models import Ingredient, Tag
+
+from .fixtures import LOCAL_CACHES
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class LoadJsonDataTests(TestCase):
+    """Загрузка ингредиентов и тегов: формат по расширению каждого
+    файла, пропуск повторов и обновление тегов."""
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def write(self, name, content):
+        path = self.directory / name
+        path.write_text(content, encoding='utf-8')
+        return str(path)
+
+    def load(self, ingredients, tags):
+        output = StringIO()
+        call_command(
+            'load_json_data', ingredients=ingredients, tags=tags,
+            stdout=output
+        )
+        return output.getvalue()
+
+    def test_formats(self):
+        ingredients = self.write(
+            'ingredients.csv',
+            'name,measurement_unit\nсоль,г\nмука,кг\nсоль,г\n'
+        )
+        tags = self.write('tags.json', json.dumps([
+            {'name': 'Завтрак', 'color': '#E26C2D', 'slug': 'breakfast'},
+            {'name': 'Обед', 'color': '#49B64E', 'slug': 'lunch'},
+        ], ensure_ascii=False))
+        output = self.load(ingredients, tags)
+        self.assertEqual(
+            set(Ingredient.objects.values_list('name', 'measurement_unit')),
+            {('соль', 'г'), ('мука', 'кг')}
+        )
+        self.assertEqual(
+            dict(Tag.objects.values_list('slug', 'name')),
+            {'breakfast': 'Завтрак', 'lunch': 'Обед'}
+        )
+        self.assertIn('добавлено 2, обновлено 0, пропущено 1', output)
+
+    def test_tags_are_updated(self):
+        Tag.objects.create(name='Завтрак', color='#E26C2D', slug='breakfast')
+        ingredients = self.write(
+            'ingredients.jsonl', '{"name": "соль", "measurement_unit": "г"}\n'
+        )
+        tags = self.write(
+            'tags.csv',
+            'Утро,#8775D2,breakfast\nОбед,#49B64E,lunch\n'
+        )
+        output = self.load(ingredients, tags)
+        self.assertEqual(
+            set(Tag.objects.values_list('slug', 'name', 'color')),
+            {
+                ('breakfast', 'Утро', '#8775D2'),
+                ('lunch', 'Обед', '#49B64E'),
+            }
+        )
+        self.assertIn('добавлено 1, обновлено 1, пропущено 0', output)
+        self.assertEqual(Ingredient.objects.get().name, 'соль')
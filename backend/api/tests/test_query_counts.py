@@ -0,0 +1,115 @@
+from random import Random
+
+from django.test import Client, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from .fixtures import LOCAL_CACHES, clear_caches, get, get_routes, seed
+
+DATASET = {
+    'users': 20,
+    'recipes': 100,
+    'ingredients': 50,
+    'ingredients_per_recipe': 5,
+    'tags': 5,
+    'subscriptions': 5,
+    'favorites': 10,
+    'cart': 5,
+}
+
+
+@override_settings(
+    CACHES=LOCAL_CACHES, BACKGROUND_WORKERS=0, QUERY_BUDGET_STRICT=True,
+    SHARED_CACHE=False, RECIPE_CHANGE_LOG=False
+)
+class QueryCountTests(TestCase):
+    """Количество SQL-запросов маршрутов API с холодным кэшем (кэш
+    и индексы процесса очищены) и с прогретым.
+
+    Маршруты и данные те же, что у benchmark_api; бюджеты вью
+    проверяются строгим режимом RequestMetricsMiddleware."""
+
+    # маршрут: (холодный кэш, прогретый кэш)
+    counts = {
+        'recipes': (4, 0),
+        'recipes_auth': (8, 8),
+        'recipes_cursor': (7, 7),
+        'recipes_page_10': (8, 8),
+        'recipes_tags': (9, 8),
+        'recipes_author': (9, 9),
+        'recipes_favorited': (8, 8),
+        'recipes_shopping_cart': (8, 8),
+        'recipes_popular': (8, 8),
+        'recipes_search': (8, 8),
+        'recipe_detail': (7, 7),
+        'recipes_discover': (9, 9),
+        'recipes_feed': (12, 11),
+        'users': (3, 3),
+        'user_detail': (2, 2),
+        'users_me': (2, 2),
+        'subscriptions': (4, 4),
+        'tags': (1, 0),
+        'ingredients_search': (1, 0),
+        'download_shopping_cart': (2, 1),
+        'download_shopping_cart_csv': (2, 1),
+    }
+    feed_pull_counts = (12, 11)
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = Random(0)
+        user_ids, recipe_ids, ingredient_ids = seed(rng, DATASET)
+        cls.token = Token.objects.create(user_id=rng.choice(user_ids))
+        cls.routes = get_routes(rng, recipe_ids, ingredient_ids)
+
+    def setUp(self):
+        clear_caches()
+        self.anonymous = Client()
+        self.authenticated = Client(
+            HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+
+    def test_query_counts(self):
+        for name, auth, path in self.routes:
+            client = self.authenticated if auth else self.anonymous
+            cold, warm = self.counts[name]
+            with self.subTest(name):
+                clear_caches()
+                with self.assertNumQueries(cold):
+                    response = get(client, path)
+                self.assertEqual(response.status_code, 200)
+                with self.assertNumQueries(warm):
+                    get(client, path)
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_feed_pull(self):
+        """Лента с рецептами авторов без рассылки: первое чтение
+        забирает в нее последние рецепты, повторное без новых рецептов
+        только проверяет их наличие."""
+        for count in self.feed_pull_counts:
+            with self.assertNumQueries(count):
+                response = get(self.authenticated, '/api/recipes/feed/')
+            self.assertEqual(response.status_code, 200)
+
+
+@override_settings(SHARED_CACHE=True, RECIPE_CHANGE_LOG=True)
+class SharedCacheQueryCountTests(QueryCountTests):
+    """То же с общим для процессов кэшем Redis: с ним кэшируется
+    состояние пользователя и используются битовые карты тегов."""
+
+    counts = {
+        **QueryCountTests.counts,
+        'recipes_auth': (8, 5),
+        'recipes_cursor': (7, 4),
+        'recipes_page_10': (8, 5),
+        'recipes_tags': (11, 5),
+        'recipes_author': (9, 6),
+        'recipes_favorited': (8, 5),
+        'recipes_shopping_cart': (8, 5),
+        'recipes_popular': (8, 5),
+        'recipes_search': (8, 5),
+        'recipe_detail': (7, 4),
+        'recipes_discover': (9, 5),
+        'recipes_feed': (12, 8),
+        'users_me': (2, 1),
+    }
+    feed_pull_counts = (12, 8)
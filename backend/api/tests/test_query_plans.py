@@ -0,0 +1,136 @@
+import re
+
+from django.db import connection, transaction
+from django.test import TestCase
+
+from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                            ShoppingCart, ShoppingCartJob, Tag)
+from users.models import Subscription, User
+
+PROBLEMS = {
+    'postgresql': (
+        re.compile(r'Seq Scan on (\w+)'),
+        re.compile(r'\bSort\s+\('),
+    ),
+    'sqlite': (
+        re.compile(r'\bSCAN (?:TABLE )?(\w+)\s*$', re.MULTILINE),
+        re.compile(r'USE TEMP B-TREE'),
+    ),
+}
+SORTS = {
+    'postgresql': PROBLEMS['postgresql'][1],
+    'sqlite': PROBLEMS['sqlite'][1],
+}
+
+
+def get_plan(queryset):
+    """План запроса; в PostgreSQL без последовательного чтения, чтобы
+    на маленьких таблицах планировщик тоже выбирал индексы."""
+    if connection.vendor == 'postgresql':
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+    return queryset.explain()
+
+
+class QueryPlanTests(TestCase):
+    """Горячие запросы API используют индексы и не сортируют выборку
+    отдельно."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.author = (
+            User.objects.create_user(
+                username=f'user{number}',
+                email=f'user{number}@foodgram.ru',
+                password='password',
+                first_name='Имя',
+                last_name='Фамилия'
+            )
+            for number in range(2)
+        )
+        cls.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        ingredient = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+        recipe = Recipe.objects.create(
+            author=cls.author,
+            name='Омлет',
+            text='Описание',
+            cooking_time=10,
+            image='recipes/omelette.png'
+        )
+        recipe.tags.add(cls.tag)
+        cls.amount = IngredientAmount.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=5
+        )
+        Favorite.objects.create(user=cls.user, recipe=recipe)
+        ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        Subscription.objects.create(subscriber=cls.user, author=cls.author)
+
+    def assert_uses_indexes(self, queryset, sorts=False):
+        if connection.vendor not in PROBLEMS:
+            self.skipTest(f'Проверка не поддерживает {connection.vendor}')
+        plan = get_plan(queryset)
+        found = [
+            match.group(0).strip()
+            for pattern in PROBLEMS[connection.vendor]
+            if not (sorts and pattern is SORTS[connection.vendor])
+            for match in pattern.finditer(plan)
+        ]
+        self.assertEqual(found, [], plan)
+
+    def test_recipe_feed(self):
+        self.assert_uses_indexes(Recipe.objects.all()[:6])
+
+    def test_popular_recipes(self):
+        self.assert_uses_indexes(Recipe.objects.order_by(
+            '-favorites_count', '-pub_date', '-id'
+        )[:6])
+
+    def test_author_recipes(self):
+        self.assert_uses_indexes(
+            Recipe.objects.filter(author=self.author)[:6]
+        )
+
+    def test_tag_recipes(self):
+        self.assert_uses_indexes(Recipe.tags.through.objects.filter(
+            tag=self.tag
+        ).values('recipe_id'))
+
+    def test_subscriptions(self):
+        self.assert_uses_indexes(Subscription.objects.filter(
+            subscriber=self.user
+        ).values('author_id'))
+
+    def test_subscribers(self):
+        self.assert_uses_indexes(Subscription.objects.filter(
+            author=self.author
+        ).values('subscriber_id'))
+
+    def test_favorite_and_cart_recipes(self):
+        """Избранное и список покупок по дате рецепта: строки
+        пользователя находятся по уникальному индексу (user, recipe),
+        сортируются только они. Индекса под этот порядок нет: дата
+        публикации хранится в другой таблице."""
+        for lookup in ('favorites__user', 'shopping_list__user'):
+            with self.subTest(lookup):
+                self.assert_uses_indexes(
+                    Recipe.objects.filter(**{lookup: self.user})[:6],
+                    sorts=True
+                )
+
+    def test_recipe_ingredients(self):
+        self.assert_uses_indexes(IngredientAmount.objects.filter(
+            recipe=self.amount.recipe_id
+        ).values('ingredient_id', 'amount'))
+
+    def test_ingredient_recipes(self):
+        self.assert_uses_indexes(IngredientAmount.objects.filter(
+            ingredient=self.amount.ingredient_id
+        ).values('recipe_id'))
+
+    def test_shopping_cart_jobs_queue(self):
+        self.assert_uses_indexes(ShoppingCartJob.objects.filter(
+            status=ShoppingCartJob.PENDING
+        ).values('pk'))
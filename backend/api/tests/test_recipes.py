@@ -0,0 +1,144 @@
+import base64
+import hashlib
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from recipes import images
+from recipes.models import Ingredient, Recipe, Tag
+
+from .fixtures import (LOCAL_CACHES, clear_caches, create_recipe,
+                       create_user, get_client, get_image)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    CACHES=LOCAL_CACHES, BACKGROUND_WORKERS=0, MEDIA_ROOT=MEDIA_ROOT
+)
+class RecipeImageTests(TestCase):
+    """Изображение рецепта в base64: проверка, имя по хешу содержимого
+    и уменьшенные копии."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        cls.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        cls.ingredient = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        clear_caches()
+        self.client = get_client(self.user)
+
+    def create(self, image):
+        return self.client.post('/api/recipes/', {
+            'ingredients': [{'id': self.ingredient.pk, 'amount': 5}],
+            'tags': [self.tag.pk],
+            'image': image,
+            'name': 'Омлет',
+            'text': 'Описание',
+            'cooking_time': 10,
+        }, content_type='application/json')
+
+    def test_image_is_saved_by_content_hash(self):
+        image = get_image()
+        content = base64.b64decode(image.split(',', 1)[1])
+        response = self.create(image)
+        self.assertEqual(response.status_code, 201, response.content)
+        recipe = Recipe.objects.get(pk=response.json()['id'])
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        self.assertEqual(recipe.image.name, f'recipes/{digest}.png')
+        with recipe.image.open('rb') as image_file:
+            self.assertEqual(image_file.read(), content)
+
+    def test_wrapped_base64(self):
+        header, data = get_image().split(',', 1)
+        wrapped = '\n'.join(
+            data[start:start + 76] for start in range(0, len(data), 76)
+        )
+        response = self.create(f'{header},{wrapped}')
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def test_invalid_images(self):
+        not_image = base64.b64encode(b'not an image').decode()
+        for image in ('не base64!', not_image, get_image(format='BMP')):
+            with self.subTest(image=image[:20]):
+                response = self.create(image)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('image', response.json())
+
+    @override_settings(RECIPE_IMAGE_MAX_SIZE=10)
+    def test_too_large(self):
+        response = self.create(get_image())
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('10 байт', response.json()['image'][0])
+
+    def test_srcset(self):
+        response = self.create(get_image())
+        recipe_id = response.json()['id']
+        self.assertEqual(response.json()['srcset'], {})
+        images.generate_variants(recipe_id)
+        srcset = self.client.get(f'/api/recipes/{recipe_id}/').json()[
+            'srcset'
+        ]
+        self.assertIn('webp', srcset)
+        self.assertTrue(srcset['webp'].endswith('-8.webp 8w'))
+
+
+@override_settings(CACHES=LOCAL_CACHES, BACKGROUND_WORKERS=0)
+class CursorPaginationTests(TestCase):
+    """Курсорная пагинация рецептов по pagination=cursor."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user(0)
+        cls.recipe_ids = [
+            create_recipe(author, f'Рецепт {number}').pk
+            for number in range(5)
+        ][::-1]
+
+    def setUp(self):
+        clear_caches()
+
+    def test_pages_follow_publication_order(self):
+        recipe_ids = []
+        url = '/api/recipes/?pagination=cursor&limit=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.json())
+            recipe_ids += [
+                recipe['id'] for recipe in response.json()['results']
+            ]
+            url = response.json()['next']
+        self.assertEqual(recipe_ids, self.recipe_ids)
+
+    def test_page_number_pagination_is_default(self):
+        response = self.client.get('/api/recipes/?limit=2&page=2')
+        self.assertEqual(response.json()['count'], 5)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.json()['results']],
+            self.recipe_ids[2:4]
+        )
+
+    def test_own_order_is_rejected(self):
+        ingredient = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+        for path in (
+            '/api/recipes/?search=рецепт',
+            '/api/recipes/?ordering=popular',
+            f'/api/recipes/discover/?ingredients={ingredient.pk}',
+        ):
+            with self.subTest(path=path):
+                response = self.client.get(f'{path}&pagination=cursor')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('pagination', response.json())
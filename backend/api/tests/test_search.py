@@ -0,0 +1,89 @@
+from django.test import TestCase, override_settings
+
+from recipes.models import Ingredient
+
+from .fixtures import (LOCAL_CACHES, clear_caches, create_recipe,
+                       create_user, get_client)
+
+
+@override_settings(CACHES=LOCAL_CACHES, BACKGROUND_WORKERS=0)
+class SearchTests(TestCase):
+    """Полнотекстовый поиск по названию, описанию и ингредиентам
+    с сортировкой по релевантности."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user(0)
+        dill = Ingredient.objects.create(name='укроп', measurement_unit='г')
+        # борщ старше супа: выше его поднимает только релевантность
+        cls.borscht = create_recipe(author, 'Борщ', text='Со свеклой')
+        cls.soup = create_recipe(author, 'Суп', text='Почти борщ')
+        cls.salad = create_recipe(
+            author, 'Салат', ((dill, 5),), text='Свежий'
+        )
+
+    def setUp(self):
+        clear_caches()
+
+    def search(self, value):
+        response = self.client.get('/api/recipes/', {'search': value})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def test_name_ranks_above_text(self):
+        self.assertEqual(
+            self.search('борщ'), [self.borscht.pk, self.soup.pk]
+        )
+
+    def test_all_words_required(self):
+        self.assertEqual(self.search('почти борщ'), [self.soup.pk])
+
+    def test_ingredients_are_searched(self):
+        self.assertEqual(self.search('укроп'), [self.salad.pk])
+
+    def test_nothing_found(self):
+        self.assertEqual(self.search('пирог'), [])
+
+
+@override_settings(CACHES=LOCAL_CACHES, BACKGROUND_WORKERS=0)
+class DiscoverTests(TestCase):
+    """Подбор рецептов по ингредиентам одинаков по индексу в памяти
+    и по запросу к базе."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user(0)
+        cls.user = create_user(1)
+        cls.flour, cls.egg, cls.milk = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('мука', 'яйцо', 'молоко')
+        )
+        cls.pancakes = create_recipe(
+            author, 'Блины', ((cls.flour, 200), (cls.egg, 2))
+        )
+        cls.omelette = create_recipe(
+            author, 'Омлет', ((cls.flour, 10), (cls.egg, 3), (cls.milk, 50))
+        )
+        cls.bread = create_recipe(author, 'Хлеб', ((cls.flour, 500),))
+        create_recipe(author, 'Коктейль', ((cls.milk, 200),))
+
+    def discover(self, match):
+        clear_caches()
+        response = get_client(self.user).get('/api/recipes/discover/', {
+            'ingredients': f'{self.flour.pk},{self.egg.pk}',
+            'match': match,
+        })
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def test_discover(self):
+        expected = {
+            'all': [self.omelette.pk, self.pancakes.pk],
+            'any': [self.omelette.pk, self.pancakes.pk, self.bread.pk],
+            'best': [self.pancakes.pk, self.bread.pk, self.omelette.pk],
+        }
+        for change_log in (False, True):
+            for match, recipe_ids in expected.items():
+                with self.subTest(change_log=change_log, match=match):
+                    with override_settings(RECIPE_CHANGE_LOG=change_log):
+                        self.assertEqual(self.discover(match), recipe_ids)
@@ -0,0 +1,165 @@
+import csv
+import io
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api.jobs import requeue_stale_jobs
+from recipes.models import Ingredient, ShoppingCartJob, ShoppingListItem
+
+from .fixtures import (LOCAL_CACHES, clear_caches, create_recipe,
+                       create_user, get_client)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    CACHES=LOCAL_CACHES, BACKGROUND_WORKERS=0, MEDIA_ROOT=MEDIA_ROOT
+)
+class ShoppingCartTests(TestCase):
+    """Сводный список покупок и его выгрузка в разных форматах."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, author = create_user(0), create_user(1)
+        salt = Ingredient.objects.create(name='соль', measurement_unit='г')
+        flour = Ingredient.objects.create(name='мука', measurement_unit='г')
+        cls.bread = create_recipe(
+            author, 'Хлеб', ((flour, 300), (salt, 5))
+        )
+        cls.soup = create_recipe(author, 'Суп', ((salt, 3),))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        clear_caches()
+        self.client = get_client(self.user)
+        for recipe in (self.bread, self.soup):
+            response = self.client.post(
+                f'/api/recipes/{recipe.pk}/shopping_cart/'
+            )
+            self.assertEqual(response.status_code, 201)
+
+    def get_items(self):
+        return dict(
+            ShoppingListItem.objects.filter(user=self.user).values_list(
+                'ingredient__name', 'total_amount'
+            )
+        )
+
+    def download(self, format):
+        response = self.client.get(
+            f'/api/recipes/download_shopping_cart/?format={format}'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_items_are_summed(self):
+        self.assertEqual(self.get_items(), {'мука': 300, 'соль': 8})
+        response = self.client.delete(
+            f'/api/recipes/{self.soup.pk}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get_items(), {'мука': 300, 'соль': 5})
+
+    def test_renderers(self):
+        content = b''.join(self.download('txt').streaming_content)
+        self.assertEqual(
+            content.decode(),
+            'Список покупок.\n1. мука: 300 г.\n2. соль: 8 г.\n'
+        )
+        content = b''.join(self.download('csv').streaming_content)
+        self.assertEqual(
+            list(csv.reader(io.StringIO(content.decode()))),
+            [
+                ['name', 'measurement_unit', 'amount'],
+                ['мука', 'г', '300'],
+                ['соль', 'г', '8'],
+            ]
+        )
+        content = b''.join(self.download('json').streaming_content)
+        self.assertEqual(json.loads(content), [
+            {'name': 'мука', 'measurement_unit': 'г', 'amount': 300},
+            {'name': 'соль', 'measurement_unit': 'г', 'amount': 8},
+        ])
+        response = self.download('pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(
+            b''.join(response.streaming_content).startswith(b'%PDF')
+        )
+
+    def test_not_modified_until_cart_changes(self):
+        etag = self.download('txt')['ETag']
+        response = self.client.get(
+            '/api/recipes/download_shopping_cart/?format=txt',
+            HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+        self.client.delete(f'/api/recipes/{self.soup.pk}/shopping_cart/')
+        response = self.download('txt')
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn(
+            '2. соль: 5 г.', b''.join(response.streaming_content).decode()
+        )
+
+    def test_small_list_redirects_to_download(self):
+        response = self.client.post(
+            '/api/recipes/download_shopping_cart/jobs/',
+            {'format': 'csv'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 303)
+        self.assertEqual(
+            response['Location'],
+            '/api/recipes/download_shopping_cart/?format=csv'
+        )
+
+    @override_settings(SHOPPING_CART_SYNC_THRESHOLD=0)
+    def test_job(self):
+        response = self.client.post(
+            '/api/recipes/download_shopping_cart/jobs/',
+            {'format': 'csv'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 202)
+        url = '/api/recipes/download_shopping_cart/jobs/{}/'.format(
+            response.json()['id']
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], ShoppingCartJob.PENDING)
+        call_command(
+            'process_shopping_cart_jobs', '--once', stdout=io.StringIO()
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        response.close()
+        self.assertEqual(
+            content.splitlines(),
+            ['name,measurement_unit,amount', 'мука,г,300', 'соль,г,8']
+        )
+
+    def test_stale_jobs_are_requeued(self):
+        long_ago = timezone.now() - timedelta(days=1)
+        running = ShoppingCartJob.objects.create(
+            user=self.user,
+            format='txt',
+            status=ShoppingCartJob.RUNNING,
+            started=long_ago
+        )
+        pending = ShoppingCartJob.objects.create(user=self.user, format='txt')
+        ShoppingCartJob.objects.filter(pk=pending.pk).update(created=long_ago)
+        ShoppingCartJob.objects.create(user=self.user, format='txt')
+        self.assertEqual(requeue_stale_jobs(), 2)
+        running.refresh_from_db()
+        self.assertEqual(running.status, ShoppingCartJob.PENDING)
+        self.assertIsNone(running.started)
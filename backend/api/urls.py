@@ -1,6 +1,7 @@
 from django.urls import include, path
 from rest_framework import routers
 
+from api.views.metrics import metrics
 from api.views.recipes import IngredientViewSet, RecipeViewSet, TagViewSet
 from api.views.users import CustomUserViewSet
 
@@ -13,5 +14,6 @@ router.register('recipes', RecipeViewSet, basename='recipes')
 
 urlpatterns = [
     path('', include(router.urls)),
-    path('auth/', include('djoser.urls.authtoken'))
+    path('auth/', include('djoser.urls.authtoken')),
+    path('metrics/', metrics, name='metrics'),
 ]
@@ -0,0 +1,84 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.http import HttpResponse
+
+from recipes.models import ShoppingListItem
+from users.models import User
+
+
+def get_shopping_cart_ingredients(user):
+    """Читает список покупок пользователя из ShoppingListItem."""
+    return (
+        ShoppingListItem.objects.filter(user=user).values(
+            'ingredient__name',
+            'ingredient__measurement_unit',
+            ingredient_value=F('total_amount')
+        ).order_by(
+            'ingredient__name'
+        )
+    )
+
+
+def bump_shopping_cart_version(**filters):
+    """Увеличивает версию списка покупок у отобранных пользователей."""
+    User.objects.filter(**filters).update(
+        shopping_cart_version=F('shopping_cart_version') + 1
+    )
+
+
+def get_shopping_cart_key(user, format):
+    """Ключ готового файла: пользователь, версия списка и формат."""
+    return (
+        f'shopping_cart:{user.pk}:{user.shopping_cart_version}:{format}'
+    )
+
+
+def get_shopping_cart_etag(key):
+    return '"{}"'.format(hashlib.md5(key.encode()).hexdigest())
+
+
+def get_cached_shopping_cart(key):
+    """Возвращает сохраненный файл списка покупок или None."""
+    cached = cache.get(key)
+    if cached is None:
+        return None
+    content_type, content_disposition, content = cached
+    response = HttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = content_disposition
+    return response
+
+
+def cache_shopping_cart(key, response):
+    """Сохраняет файл в кэш по мере отдачи клиенту.
+
+    Файлы больше SHOPPING_CART_CACHE_MAX_SIZE не кэшируются, чтобы
+    не держать их целиком в памяти."""
+    streaming_content = response.streaming_content
+
+    def content():
+        chunks = []
+        size = 0
+        for chunk in streaming_content:
+            if chunks is not None:
+                size += len(chunk)
+                if size > settings.SHOPPING_CART_CACHE_MAX_SIZE:
+                    chunks = None
+                else:
+                    chunks.append(chunk)
+            yield chunk
+        if chunks is not None:
+            cache.set(
+                key,
+                (
+                    response['Content-Type'],
+                    response['Content-Disposition'],
+                    b''.join(chunks)
+                ),
+                settings.SHOPPING_CART_CACHE_TIMEOUT
+            )
+
+    response.streaming_content = content()
+    return response
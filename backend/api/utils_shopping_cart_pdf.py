@@ -1,25 +1,31 @@
-import io
+import tempfile
 
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import FileResponse
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
 
+FONT_NAME = 'Arial'
 
-def create_shopping_cart(ingredients_cart):
-    """Функция для формирования списка покупок."""
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = (
-        "attachment; filename='shopping_cart.pdf'"
-    )
-    pdfmetrics.registerFont(
-        TTFont('Arial', 'data/arial.ttf', 'UTF-8')
-    )
-    buffer = io.BytesIO()
-    pdf_file = canvas.Canvas(buffer)
-    pdf_file.setFont('Arial', 24)
+
+def register_fonts():
+    """Регистрирует шрифт для PDF один раз на процесс.
+
+    ReportLab встраивает в документ только подмножество использованных
+    глифов, поэтому повторно разбирать TTF-файл при каждой загрузке
+    списка покупок не нужно."""
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(
+            TTFont(FONT_NAME, str(settings.CSV_FILES_DIR / 'arial.ttf'))
+        )
+
+
+def draw_shopping_cart(pdf_file, ingredients_cart):
+    """Постранично рисует список покупок на холсте ReportLab."""
+    pdf_file.setFont(FONT_NAME, 24)
     pdf_file.drawString(200, 800, 'Список покупок.')
-    pdf_file.setFont('Arial', 14)
+    pdf_file.setFont(FONT_NAME, 14)
     from_bottom = 750
     for number, ingredient in enumerate(ingredients_cart, start=1):
         pdf_file.drawString(
@@ -33,10 +39,24 @@ def create_shopping_cart(ingredients_cart):
         if from_bottom <= 50:
             from_bottom = 800
             pdf_file.showPage()
-            pdf_file.setFont('Arial', 14)
+            pdf_file.setFont(FONT_NAME, 14)
     pdf_file.showPage()
+
+
+def create_shopping_cart(ingredients_cart):
+    """Функция для формирования списка покупок.
+
+    Готовые страницы сжимаются сразу, а документ пишется во временный
+    файл и отдается клиенту блоками, без копий в памяти процесса."""
+    register_fonts()
+    pdf = tempfile.TemporaryFile()
+    pdf_file = canvas.Canvas(pdf, pageCompression=1)
+    draw_shopping_cart(pdf_file, ingredients_cart)
     pdf_file.save()
-    pdf = buffer.getvalue()
-    buffer.close()
-    response.write(pdf)
-    return response
+    pdf.seek(0)
+    return FileResponse(
+        pdf,
+        as_attachment=True,
+        filename='shopping_cart.pdf',
+        content_type='application/pdf'
+    )
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+
+from recipes.cache import get_version
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscription
+
+
+def get_viewer_namespace(user_id):
+    return f'viewer:{user_id}'
+
+
+class ViewerState:
+    """Избранное, список покупок и подписки пользователя в виде множеств
+    идентификаторов.
+
+    Каждое множество загружается одним запросом при первом обращении.
+    Между запросами множества хранятся в кэше VIEWER_STATE_CACHE_TIMEOUT
+    секунд под версией пользователя, которую сигналы меняют при записи
+    в Favorite, ShoppingCart и Subscription. Только при общем кэше
+    (SHARED_CACHE): в LocMem версию, измененную другим процессом, этот
+    процесс не увидит."""
+
+    def __init__(self, user):
+        self.user = user
+
+    def load(self, name, queryset):
+        timeout = settings.VIEWER_STATE_CACHE_TIMEOUT
+        if not (timeout and settings.SHARED_CACHE):
+            return set(queryset)
+        version = get_version(get_viewer_namespace(self.user.pk))
+        key = f'viewer_state:{self.user.pk}:{version}:{name}'
+        ids = cache.get(key)
+        if ids is None:
+            ids = set(queryset)
+            cache.set(key, ids, timeout)
+        return ids
+
+    @cached_property
+    def favorited(self):
+        return self.load(
+            'favorited',
+            Favorite.objects.filter(user=self.user).values_list(
+                'recipe_id', flat=True
+            )
+        )
+
+    @cached_property
+    def in_shopping_cart(self):
+        return self.load(
+            'in_shopping_cart',
+            ShoppingCart.objects.filter(user=self.user).values_list(
+                'recipe_id', flat=True
+            )
+        )
+
+    @cached_property
+    def subscribed(self):
+        return self.load(
+            'subscribed',
+            Subscription.objects.filter(subscriber=self.user).values_list(
+                'author_id', flat=True
+            )
+        )
+
+
+def get_viewer_state(context):
+    """Возвращает состояние текущего пользователя из контекста
+    сериализатора или None для анонимного запроса.
+
+    Созданное состояние запоминается в запросе, поэтому его разделяют
+    все сериализаторы ответа, даже с отдельно собранным контекстом."""
+    state = context.get('viewer_state')
+    if state is not None:
+        return state
+    request = context.get('request')
+    if not (request and request.user.is_authenticated):
+        return None
+    state = getattr(request, 'viewer_state', None)
+    if state is None:
+        state = request.viewer_state = ViewerState(request.user)
+    context['viewer_state'] = state
+    return state
@@ -1,9 +1,11 @@
+from .metrics import metrics
 from .recipes import IngredientViewSet, RecipeViewSet, TagViewSet
 from .users import CustomUserViewSet
 
 __all__ = [
     CustomUserViewSet,
     IngredientViewSet,
+    metrics,
     RecipeViewSet,
     TagViewSet
 ]
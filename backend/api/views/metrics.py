@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from ..metrics import render_metrics
+
+
+def metrics(request):
+    """Гистограммы запросов к API в текстовом формате Prometheus.
+
+    Доступна только при METRICS_ENABLED; закрывать ее от внешнего мира
+    нужно на уровне nginx."""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    return HttpResponse(
+        render_metrics(), content_type='text/plain; version=0.0.4'
+    )
@@ -1,33 +1,54 @@
-from django.db.models import Sum
+from django.conf import settings
+from django.db.models import Case, Prefetch, When
+from django.http import FileResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from api.serializers.recipes import (FavoriteSerializer, IngredientSerializer,
+                                     RecipeDiscoverySerializer,
                                      RecipeGETSerializer, RecipeSerializer,
+                                     ShoppingCartJobSerializer,
                                      ShoppingCartSerializer, TagSerializer)
-from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
-                            ShoppingCart, Tag)
+from recipes import timeline
+from recipes.models import (Favorite, FeedEntry, Ingredient, IngredientAmount,
+                            Recipe, ShoppingCart, ShoppingCartJob, Tag)
+from recipes.search import discover_recipes
 
 from ..filters import IngredientSearchFilter, RecipeFilter
-from ..pagination import CustomPageNumberPagination
+from ..indexes import ingredient_index, recipe_ingredient_index
+from ..jobs import cleanup_shopping_cart_jobs, enqueue_shopping_cart_job
+from ..mixins import ResponseCacheMixin
+from ..pagination import (CursorPaginationMixin, CustomPageNumberPagination,
+                          FeedCursorPagination, RecipeCursorPagination)
 from ..permissions import AuthorOrReadOnly
-from ..utils_shopping_cart_pdf import create_shopping_cart
+from ..renderers import get_shopping_cart_renderers
+from ..utils_shopping_cart import (cache_shopping_cart,
+                                   get_cached_shopping_cart,
+                                   get_shopping_cart_etag,
+                                   get_shopping_cart_ingredients,
+                                   get_shopping_cart_key)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для создания обьектов класса Tag."""
 
+    cache_namespaces = ('tags',)
+    query_budget = 2
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (permissions.AllowAny,)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ResponseCacheMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для создания обьектов класса Ingredient."""
 
+    cache_namespaces = ('ingredients',)
+    query_budget = 2
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (permissions.AllowAny,)
@@ -35,19 +56,62 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = IngredientSearchFilter
     search_fields = ('^name',)
 
+    def list(self, request, *args, **kwargs):
+        """Поиск по названию отдается из индекса в памяти процесса,
+        если он включен настройкой INGREDIENT_SEARCH_INDEX и кэш общий
+        для процессов (SHARED_CACHE): иначе индекс не узнает об
+        изменениях каталога в других процессах."""
+        name = request.query_params.get('name')
+        if (name and settings.INGREDIENT_SEARCH_INDEX
+                and settings.SHARED_CACHE):
+            return Response(ingredient_index.search(name))
+        return super().list(request, *args, **kwargs)
 
-class RecipeViewSet(viewsets.ModelViewSet):
-    """Вьюсет для создания обьектов класса Recipe."""
 
+class RecipeViewSet(ResponseCacheMixin, CursorPaginationMixin,
+                    viewsets.ModelViewSet):
+    """Вьюсет для создания обьектов класса Recipe.
+
+    Ответы анонимным пользователям кэшируются; счетчики избранного
+    меняются без сигналов, поэтому сортировка по популярности
+    обновляется по истечении RECIPE_CACHE_TIMEOUT."""
+
+    cache_namespaces = ('recipes', 'tags', 'ingredients')
+    cache_anonymous_only = True
+    cache_timeout = settings.RECIPE_CACHE_TIMEOUT
+    query_budget = {
+        'list': 11,
+        'retrieve': 7,
+        'discover': 9,
+        'feed': 13,
+        'download_shopping_cart': 3,
+    }
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     pagination_class = CustomPageNumberPagination
+    cursor_pagination_class = RecipeCursorPagination
+    cursor_incompatible_params = ('search', 'ordering')
+    cursor_incompatible_actions = ('discover',)
     permission_classes = (
         permissions.AllowAny, AuthorOrReadOnly
     )
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    def get_queryset(self):
+        """Собирает выборку рецептов со всеми связанными объектами,
+        чтобы количество запросов не зависело от размера страницы.
+
+        Отметки избранного, списка покупок и подписки сериализаторы
+        берут из ViewerState."""
+        return Recipe.objects.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredientamount_set',
+                queryset=IngredientAmount.objects.select_related('ingredient')
+            )
+        )
+
     @staticmethod
     def favorite_shopping_cart(serilizers, request, pk):
         """Общий метод добавления рецептов (ингредиентов) в избранное."""
@@ -109,27 +173,148 @@ class RecipeViewSet(viewsets.ModelViewSet):
         ).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='discover',
+        url_name='discover'
+    )
+    def discover(self, request):
+        """Подбирает рецепты по набору ингредиентов.
+
+        Параметр ingredients — id ингредиентов через запятую, match —
+        all, any или best (по умолчанию). Кандидаты отбираются по
+        инвертированному индексу в памяти, если он обновляется по
+        журналу изменений (RECIPE_CHANGE_LOG), иначе запросом к базе;
+        остальные фильтры применяются к первым RECIPE_DISCOVERY_LIMIT
+        из них."""
+        params = RecipeDiscoverySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        search = discover_recipes
+        if settings.RECIPE_CHANGE_LOG:
+            search = recipe_ingredient_index.search
+        recipe_ids = search(
+            params.validated_data['ingredients'],
+            params.validated_data['match']
+        )
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            pk__in=recipe_ids
+        )
+        if recipe_ids:
+            queryset = queryset.order_by(Case(*(
+                When(pk=pk, then=position)
+                for position, pk in enumerate(recipe_ids)
+            )))
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='feed',
+        url_name='feed',
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь.
+
+        Читается из записей ленты по курсору без OFFSET; новые рецепты
+        авторов, в том числе без рассылки, предварительно забираются
+        в ленту."""
+        timeline.pull(request.user.pk)
+        entries = FeedEntry.objects.filter(user=request.user).prefetch_related(
+            Prefetch('recipe', queryset=self.get_queryset())
+        )
+        paginator = FeedCursorPagination()
+        page = paginator.paginate_queryset(entries, request, view=self)
+        serializer = self.get_serializer(
+            [entry.recipe for entry in page], many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
+
     @action(
         detail=False,
         methods=['get'],
         url_path='download_shopping_cart',
         url_name='download_shopping_cart',
-        permission_classes=(permissions.IsAuthenticated,)
+        permission_classes=(permissions.IsAuthenticated,),
+        renderer_classes=get_shopping_cart_renderers()
     )
     def download_shopping_cart(self, request):
-        """Позволяет текущему пользователю загрузить список покупок."""
-        ingredients_cart = (
-            IngredientAmount.objects.filter(
-                recipe__shopping_list__user=request.user
-            ).values(
-                'ingredient__name',
-                'ingredient__measurement_unit',
-            ).annotate(ingredient_value=Sum('amount'))
-            .order_by(
-                'ingredient__name'
+        """Позволяет текущему пользователю загрузить список покупок.
+
+        Формат выбирается параметром format или заголовком Accept,
+        по умолчанию — PDF. Готовый файл кэшируется до следующего
+        изменения списка покупок, повторная загрузка с If-None-Match
+        получает ответ 304."""
+        renderer = request.accepted_renderer
+        key = get_shopping_cart_key(request.user, renderer.format)
+        etag = get_shopping_cart_etag(key)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = get_cached_shopping_cart(key)
+        if response is None:
+            ingredients_cart = get_shopping_cart_ingredients(request.user)
+            response = cache_shopping_cart(
+                key, renderer.get_response(ingredients_cart.iterator())
+            )
+        response['ETag'] = etag
+        return response
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='download_shopping_cart/jobs',
+        url_name='download_shopping_cart_jobs',
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def download_shopping_cart_jobs(self, request):
+        """Ставит генерацию списка покупок в очередь.
+
+        Небольшие списки, не больше SHOPPING_CART_SYNC_THRESHOLD рецептов,
+        в очередь не ставятся: ответ 303 перенаправляет на обычную
+        загрузку, которая отдает файл из кэша без записи в базу."""
+        serializer = ShoppingCartJobSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cleanup_shopping_cart_jobs()
+        if (request.user.shopping_list.count()
+                <= settings.SHOPPING_CART_SYNC_THRESHOLD):
+            url = reverse('recipes-download_shopping_cart')
+            format = serializer.validated_data['format']
+            return Response(
+                status=status.HTTP_303_SEE_OTHER,
+                headers={'Location': f'{url}?format={format}'}
+            )
+        job = serializer.save(user=request.user)
+        enqueue_shopping_cart_job(job)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path=r'download_shopping_cart/jobs/(?P<job_id>[0-9a-f-]+)',
+        url_name='download_shopping_cart_job',
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def download_shopping_cart_job(self, request, job_id):
+        """Возвращает статус задачи, а после ее выполнения — файл."""
+        job = get_object_or_404(
+            ShoppingCartJob, pk=job_id, user=request.user
+        )
+        if job.status == ShoppingCartJob.DONE:
+            return FileResponse(
+                job.file.open('rb'),
+                as_attachment=True,
+                filename=f'shopping_cart.{job.format}'
+            )
+        return Response(
+            ShoppingCartJobSerializer(job).data,
+            status=(
+                status.HTTP_200_OK if job.status == ShoppingCartJob.FAILED
+                else status.HTTP_202_ACCEPTED
             )
         )
-        return create_shopping_cart(ingredients_cart)
 
     def get_serializer_class(self):
         """Определяет какой сериализатор будет использоваться
@@ -1,3 +1,5 @@
+from django.db.models import (BooleanField, Exists, OuterRef, Prefetch,
+                              Subquery, Value)
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import permissions, status
@@ -7,19 +9,45 @@ from rest_framework.response import Response
 from api.serializers.users import (CustomUserSerializer,
                                    SubscriptionSerializer,
                                    SubscriptionShowSerializer)
+from recipes.models import Recipe
 from users.models import Subscription, User
 
-from ..pagination import CustomPageNumberPagination
+from ..pagination import (CursorPaginationMixin, CustomPageNumberPagination,
+                          UserCursorPagination)
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(CursorPaginationMixin, UserViewSet):
     """Вьюсет для создания обьектов класса User."""
 
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
     pagination_class = CustomPageNumberPagination
+    cursor_pagination_class = UserCursorPagination
+    query_budget = {
+        'list': 3,
+        'retrieve': 3,
+        'get_me': 2,
+        'get_subscriptions': 5,
+    }
     permission_classes = (permissions.AllowAny,)
 
+    def get_queryset(self):
+        """Отметку подписки на каждого пользователя считает сама выборка
+        одним подзапросом Exists."""
+        queryset = super().get_queryset()
+        user = self.request.user
+        if not user.is_authenticated or self.action not in (
+            'list', 'retrieve'
+        ):
+            return queryset
+        return queryset.annotate(
+            is_subscribed=Exists(
+                Subscription.objects.filter(
+                    subscriber=user, author=OuterRef('pk')
+                )
+            )
+        )
+
     @action(
         detail=False,
         methods=['get', 'patch'],
@@ -82,7 +110,21 @@ class CustomUserViewSet(UserViewSet):
     def get_subscriptions(self, request):
         """Возвращает авторов контента, на которых подписан
         текущий пользователь.."""
-        authors = User.objects.filter(author__subscriber=request.user)
+        recipes = Recipe.objects.all()
+        limit = request.query_params.get('recipes_limit')
+        if limit and limit.isdigit():
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).values('pk')[:int(limit)]
+            ))
+        authors = User.objects.filter(
+            author__subscriber=request.user
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField())
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='limited_recipes')
+        ).order_by('username')
         result_pages = self.paginate_queryset(
             queryset=authors
         )
@@ -33,6 +33,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -40,7 +41,6 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -82,6 +82,38 @@ else:
         }
     }
 
+# Кэш общий для всех процессов: в LocMem каждый процесс видит только
+# свои записи, и данные, которые меняют другие процессы, там не хранятся.
+SHARED_CACHE = bool(os.getenv('REDIS_URL') or os.getenv('CACHE_DIR'))
+# Журнал изменений рецептов для индексов в памяти нумеруется через
+# cache.incr, а он атомарен только в Redis: в файловом кэше параллельные
+# записи теряются, и индексы молча расходятся с базой.
+RECIPE_CHANGE_LOG = bool(os.getenv('REDIS_URL'))
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+            'KEY_PREFIX': 'foodgram',
+            'OPTIONS': {
+                'IGNORE_EXCEPTIONS': True,
+            },
+        }
+    }
+elif os.getenv('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_DIR'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -147,3 +179,48 @@ LENGTH_OF_FIELDS_RECIPES = 50
 LENGTH_OF_FIELDS_USER = 150
 MAX_INGREDIENTS = 5000
 PAGE_SIZE = 6
+
+SHOPPING_CART_RENDERERS = [
+    'api.renderers.ShoppingCartPDFRenderer',
+    'api.renderers.ShoppingCartTextRenderer',
+    'api.renderers.ShoppingCartCSVRenderer',
+    'api.renderers.ShoppingCartJSONRenderer',
+]
+SHOPPING_CART_CACHE_TIMEOUT = 60 * 60
+SHOPPING_CART_CACHE_MAX_SIZE = 1024 * 1024
+SHOPPING_CART_SYNC_THRESHOLD = int(
+    os.getenv('SHOPPING_CART_SYNC_THRESHOLD', 20)
+)
+SHOPPING_CART_JOB_TTL = 24 * 60 * 60
+SHOPPING_CART_JOB_TIMEOUT = 10 * 60
+SHOPPING_CART_JOB_CLEANUP_INTERVAL = 10 * 60
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 2))
+INGREDIENT_SEARCH_LIMIT = 50
+INGREDIENT_SEARCH_INDEX = (
+    os.getenv('INGREDIENT_SEARCH_INDEX', 'True') == 'True'
+)
+INGREDIENT_INDEX_TTL = 5 * 60
+CATALOG_CACHE_TIMEOUT = 15 * 60
+RECIPE_CACHE_TIMEOUT = 60
+VIEWER_STATE_CACHE_TIMEOUT = 5 * 60
+SEARCH_CONFIG = 'russian'
+RECIPE_DISCOVERY_LIMIT = 100
+RECIPE_DISCOVERY_MAX_INGREDIENTS = 50
+RECIPE_INDEX_TTL = 15 * 60
+RECIPE_INDEX_MAX_CHANGES = 1000
+RECIPE_TAG_FILTER_MAX_IDS = 1000
+FEED_FANOUT_LIMIT = int(os.getenv('FEED_FANOUT_LIMIT', 10000))
+FEED_BACKFILL_LIMIT = 100
+FEED_PULL_OVERLAP = 60
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', 'False') == 'True'
+RECIPE_IMAGE_MAX_SIZE = int(
+    os.getenv('RECIPE_IMAGE_MAX_SIZE', 10 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.getenv('RECIPE_IMAGE_MAX_PIXELS', 40 * 1000 * 1000)
+)
+RECIPE_IMAGE_WIDTHS = (320, 640, 1280)
+RECIPE_IMAGE_FORMATS = ('webp', 'avif')
+RECIPE_IMAGE_QUALITY = 80
+DATA_UPLOAD_MAX_MEMORY_SIZE = RECIPE_IMAGE_MAX_SIZE * 4 // 3 + 1024 * 1024
@@ -1,8 +1,10 @@
 from django.conf import settings
 from django.contrib import admin
 
+from . import shopping_list
 from .models import (Favorite, Ingredient, IngredientAmount, Recipe,
-                     ShoppingCart, Tag)
+                     ShoppingCart, ShoppingCartJob, ShoppingListItem, Tag)
+from .search import update_search_index
 
 
 @admin.register(Tag)
@@ -65,11 +67,17 @@ class RecipeAdmin(admin.ModelAdmin):
     ]
 
     empty_value_display = 'значение отсутствует'
-    list_editable = ('author',)
     list_filter = ('author', 'name', 'tags')
     list_per_page = settings.LIST_PER_PAGE
     search_fields = ('author__username', 'name',)
 
+    def get_readonly_fields(self, request, obj=None):
+        """Автора опубликованного рецепта сменить нельзя: от него
+        зависят счетчики рецептов пользователей и ленты подписчиков."""
+        if obj is not None:
+            return ('author',)
+        return ()
+
     def get_ingredients(self, object):
         """Получает ингредиент или список ингредиентов рецепта."""
         return '\n'.join(
@@ -86,10 +94,22 @@ class RecipeAdmin(admin.ModelAdmin):
 
     def count_favorite(self, object):
         """Вычисляет количество добавлений рецепта в избранное."""
-        return object.favorites.count()
+        return object.favorites_count
 
     count_favorite.short_description = 'Количество добавлений в избранное'
 
+    def save_related(self, request, form, formsets, change):
+        """Переносит изменения состава рецепта в списки покупок
+        и поисковый индекс."""
+        old_amounts = shopping_list.get_recipe_amounts(form.instance.pk)
+        super().save_related(request, form, formsets, change)
+        shopping_list.change_recipe(
+            form.instance.pk,
+            old_amounts,
+            shopping_list.get_recipe_amounts(form.instance.pk)
+        )
+        update_search_index([form.instance.pk])
+
 
 @admin.register(IngredientAmount)
 class IngredientAmountAdmin(admin.ModelAdmin):
@@ -104,10 +124,50 @@ class IngredientAmountAdmin(admin.ModelAdmin):
     empty_value_display = 'значение отсутствует'
     list_per_page = settings.LIST_PER_PAGE
 
+    def change_recipes(self, recipe_ids, change):
+        """Выполняет change и переносит изменение состава рецептов
+        в списки покупок и поисковый индекс."""
+        old_amounts = {
+            recipe_id: shopping_list.get_recipe_amounts(recipe_id)
+            for recipe_id in recipe_ids
+        }
+        change()
+        for recipe_id, amounts in old_amounts.items():
+            shopping_list.change_recipe(
+                recipe_id,
+                amounts,
+                shopping_list.get_recipe_amounts(recipe_id)
+            )
+        update_search_index(list(recipe_ids))
+
+    def save_model(self, request, obj, form, change):
+        recipe_ids = {obj.recipe_id, form.initial.get('recipe')} - {None}
+        self.change_recipes(
+            recipe_ids,
+            lambda: super(IngredientAmountAdmin, self).save_model(
+                request, obj, form, change
+            )
+        )
+
+    def delete_model(self, request, obj):
+        self.change_recipes(
+            {obj.recipe_id},
+            lambda: super(IngredientAmountAdmin, self).delete_model(
+                request, obj
+            )
+        )
+
+    def delete_queryset(self, request, queryset):
+        self.change_recipes(
+            set(queryset.values_list('recipe_id', flat=True)),
+            lambda: super(IngredientAmountAdmin, self).delete_queryset(
+                request, queryset
+            )
+        )
 
-@admin.register(Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
-    """Класс настройки раздела избранного."""
+
+class FavoriteShoppingCartAdmin(admin.ModelAdmin):
+    """Общие настройки разделов избранного и списка покупок."""
 
     list_display = (
         'pk',
@@ -116,24 +176,57 @@ class FavoriteAdmin(admin.ModelAdmin):
     )
 
     empty_value_display = 'значение отсутствует'
-    list_editable = ('user', 'recipe')
     list_filter = ('user',)
     search_fields = ('user__username',)
     list_per_page = settings.LIST_PER_PAGE
 
+    def get_readonly_fields(self, request, obj=None):
+        """Запись нельзя перенести на другого пользователя или рецепт:
+        сигналы ведут счетчики рецептов и списки покупок только при
+        создании и удалении записи."""
+        if obj is not None:
+            return ('user', 'recipe')
+        return ()
+
+
+@admin.register(Favorite)
+class FavoriteAdmin(FavoriteShoppingCartAdmin):
+    """Класс настройки раздела избранного."""
+
 
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
+class ShoppingCartAdmin(FavoriteShoppingCartAdmin):
     """Класс настройки раздела рецептов, которые добавлены в список покупок."""
 
+
+@admin.register(ShoppingCartJob)
+class ShoppingCartJobAdmin(admin.ModelAdmin):
+    """Класс настройки раздела задач генерации списка покупок."""
+
     list_display = (
         'pk',
         'user',
-        'recipe',
+        'format',
+        'status',
+        'created',
     )
 
-    empty_value_display = 'значение отсутствует'
-    list_editable = ('user', 'recipe')
-    list_filter = ('user',)
+    list_filter = ('status', 'format')
     search_fields = ('user__username',)
     list_per_page = settings.LIST_PER_PAGE
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    """Класс настройки раздела сводных списков покупок."""
+
+    list_display = (
+        'pk',
+        'user',
+        'ingredient',
+        'total_amount',
+    )
+
+    list_filter = ('user',)
+    search_fields = ('user__username', 'ingredient__name')
+    list_per_page = settings.LIST_PER_PAGE
@@ -0,0 +1,44 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_version(namespace):
+    """Возвращает текущую версию пространства имен кэша.
+
+    Версия — момент последнего изменения данных в наносекундах, поэтому
+    по ней же можно отдавать Last-Modified. Если кэш недоступен,
+    каждый вызов получает новую версию и кэш фактически отключается."""
+    key = f'version:{namespace}'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key, time.time_ns())
+    return version
+
+
+def get_versions(*namespaces):
+    """Возвращает версии нескольких пространств имен одним запросом
+    к кэшу."""
+    keys = [f'version:{namespace}' for namespace in namespaces]
+    versions = cache.get_many(keys)
+    return [
+        versions[key] if key in versions else get_version(namespace)
+        for key, namespace in zip(keys, namespaces)
+    ]
+
+
+def bump_version(*namespaces):
+    """Делает недействительными данные, сохраненные под старой версией."""
+    version = time.time_ns()
+    cache.set_many(
+        {f'version:{namespace}': version for namespace in namespaces},
+        None
+    )
+
+
+def bump_version_on_commit(*namespaces):
+    """Меняет версии после фиксации транзакции, чтобы параллельный
+    запрос не сохранил под новой версией еще не измененные данные."""
+    transaction.on_commit(lambda: bump_version(*namespaces))
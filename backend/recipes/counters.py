@@ -0,0 +1,60 @@
+from django.apps import apps
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+COUNTERS = (
+    # (модель со счетчиком, поле счетчика, связанная модель, поле связи)
+    (('recipes', 'Recipe'), 'favorites_count',
+     ('recipes', 'Favorite'), 'recipe'),
+    (('recipes', 'Recipe'), 'shopping_cart_count',
+     ('recipes', 'ShoppingCart'), 'recipe'),
+    (('users', 'User'), 'recipes_count',
+     ('recipes', 'Recipe'), 'author'),
+    (('users', 'User'), 'subscribers_count',
+     ('users', 'Subscription'), 'author'),
+)
+
+
+class AtomicFieldsMixin:
+    """Исключает из обычного save() поля, которые меняются только
+    атомарными UPDATE: счетчики, версии и производные данные.
+
+    Иначе сохранение всей строки записало бы прочитанные ранее значения
+    поверх параллельных изменений через F()."""
+
+    atomic_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (not self._state.adding and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.atomic_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+def change_counter(model, pk, field, delta):
+    """Атомарно изменяет счетчик одной строки, не опуская его ниже нуля."""
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def recount():
+    """Пересчитывает все счетчики одним UPDATE на каждый счетчик."""
+    for counted, field, related, related_field in COUNTERS:
+        related_model = apps.get_model(*related)
+        apps.get_model(*counted).objects.update(**{
+            field: Coalesce(
+                Subquery(
+                    related_model.objects.filter(
+                        **{related_field: OuterRef('pk')}
+                    ).order_by().values(related_field).annotate(
+                        count=Count('pk')
+                    ).values('count')
+                ),
+                0
+            )
+        })
@@ -0,0 +1,76 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+from .cache import bump_version
+from .models import Recipe
+
+VARIANTS_DIR = 'recipes/variants'
+
+
+def get_formats():
+    """Форматы уменьшенных копий, которые поддерживает установленный
+    Pillow."""
+    return [
+        format for format in settings.RECIPE_IMAGE_FORMATS
+        if features.check(format)
+    ]
+
+
+def is_actual(recipe):
+    """Проверяет, построены ли копии для текущего изображения рецепта."""
+    return bool(recipe.image) and (
+        recipe.image_variants.get('source') == recipe.image.name
+    )
+
+
+def save_variant(image, name, width, format):
+    """Сохраняет копию изображения шириной не больше width.
+
+    Имя копии строится из имени исходника, которое содержит хеш
+    содержимого, поэтому уже сохраненные копии не пересоздаются."""
+    if default_storage.exists(name):
+        return
+    variant = image.copy()
+    variant.thumbnail((width, image.height), Image.LANCZOS)
+    buffer = BytesIO()
+    variant.save(
+        buffer, format=format.upper(), quality=settings.RECIPE_IMAGE_QUALITY
+    )
+    default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def generate_variants(recipe_id):
+    """Строит уменьшенные копии изображения рецепта во всех форматах
+    и записывает их список в Recipe.image_variants."""
+    recipe = Recipe.objects.filter(pk=recipe_id).only(
+        'image', 'image_variants'
+    ).first()
+    if recipe is None or not recipe.image or is_actual(recipe):
+        return
+    source = recipe.image.name
+    stem = os.path.splitext(os.path.basename(source))[0]
+    variants = {'source': source}
+    with recipe.image.open('rb') as image_file:
+        with Image.open(image_file) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            widths = sorted({
+                min(width, image.width)
+                for width in settings.RECIPE_IMAGE_WIDTHS
+            })
+            for format in get_formats():
+                variants[format] = []
+                for width in widths:
+                    name = f'{VARIANTS_DIR}/{stem}-{width}.{format}'
+                    save_variant(image, name, width, format)
+                    variants[format].append((name, width))
+    if Recipe.objects.filter(pk=recipe_id, image=source).update(
+        image_variants=variants
+    ):
+        bump_version('recipes')
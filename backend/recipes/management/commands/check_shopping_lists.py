@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import ShoppingListItem
+from recipes.shopping_list import get_expected_items, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Сверить списки покупок с корзинами пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Пересобрать списки покупок, в которых найдены расхождения'
+        )
+
+    def handle(self, *args, **options):
+        expected = get_expected_items()
+        actual = {
+            (user_id, ingredient_id): total_amount
+            for user_id, ingredient_id, total_amount in
+            ShoppingListItem.objects.values_list(
+                'user_id', 'ingredient_id', 'total_amount'
+            )
+        }
+        mismatches = sorted(
+            key for key in expected.keys() | actual.keys()
+            if expected.get(key) != actual.get(key)
+        )
+        for user_id, ingredient_id in mismatches:
+            self.stdout.write(
+                f'Пользователь {user_id}, ингредиент {ingredient_id}: '
+                f'ожидается {expected.get((user_id, ingredient_id))}, '
+                f'в таблице {actual.get((user_id, ingredient_id))}'
+            )
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+            return
+        if options['fix']:
+            rebuild(sorted({user_id for user_id, _ in mismatches}))
+            self.stdout.write(self.style.SUCCESS(
+                f'Пересобрано строк с расхождениями: {len(mismatches)}'
+            ))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'Найдено расхождений: {len(mismatches)}'
+            ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import generate_variants, is_actual
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Построить уменьшенные копии изображений рецептов'
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='').only(
+            'image', 'image_variants'
+        )
+        generated = 0
+        for recipe in recipes.iterator():
+            if not is_actual(recipe):
+                generate_variants(recipe.pk)
+                generated += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано изображений: {generated}')
+        )
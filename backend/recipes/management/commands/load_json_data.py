@@ -1,25 +1,231 @@
+import csv
+import io
 import json
+import time
+from itertools import islice
+from pathlib import Path
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
+from recipes.cache import bump_version
 from recipes.models import Ingredient, Tag
 
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_json(data_file):
+    """Построчно разбирает JSON-массив объектов или JSON Lines,
+    не загружая файл в память целиком."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    while True:
+        chunk = data_file.read(CHUNK_SIZE)
+        buffer += chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in '[],\r\n\t ':
+                position += 1
+            if position == len(buffer):
+                break
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise CommandError(
+                        f'Некорректный JSON в {data_file.name}'
+                    )
+                break
+            yield item
+        buffer = buffer[position:]
+        if not chunk:
+            return
+
+
+def iter_csv(data_file, fields):
+    """Читает CSV без заголовка или с заголовком из имен полей."""
+    for row in csv.reader(data_file):
+        if not row or tuple(row) == fields:
+            continue
+        yield dict(zip(fields, row))
+
+
+def iter_rows(path, fields):
+    """Читает файл в формате, определенном по его расширению: .csv —
+    CSV, остальные — JSON или JSON Lines."""
+    with open(path, encoding='utf-8', newline='') as data_file:
+        if Path(path).suffix.lower() == '.csv':
+            yield from iter_csv(data_file, fields)
+        else:
+            yield from iter_json(data_file)
+
+
+def iter_unique(rows, fields, key_fields):
+    """Убирает повторяющиеся строки.
+
+    Значения не обрезаются: иначе повторная загрузка файла со значением
+    вроде «Ужин » создала бы дубликат уже загруженной строки."""
+    seen = set()
+    for row in rows:
+        values = {field: str(row.get(field, '')) for field in fields}
+        key = tuple(values[field] for field in key_fields)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield values
+
+
+def iter_batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
 
 class Command(BaseCommand):
     help = ' Загрузить данные в модель ингредиентов '
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ingredients',
+            default=settings.CSV_FILES_DIR / 'ingredients.json',
+            help='Файл ингредиентов в формате JSON, JSON Lines или CSV; '
+                 'формат определяется по расширению'
+        )
+        parser.add_argument(
+            '--tags',
+            default=settings.CSV_FILES_DIR / 'tags.json',
+            help='Файл тегов в тех же форматах; существующим по slug '
+                 'тегам обновляются название и цвет, пустое значение '
+                 'пропускает загрузку тегов'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество строк в одной пачке вставки'
+        )
+        parser.add_argument(
+            '--copy', action='store_true',
+            help='Загружать ингредиенты через COPY (только PostgreSQL)'
+        )
+
+    def bulk_upsert(self, model, key_fields, update_fields, batches):
+        """Вставляет новые строки пачками; у существующих строк с тем же
+        ключом обновляет update_fields, если значения изменились.
+
+        Django 3.2 не умеет bulk_create(update_conflicts=True), поэтому
+        изменения переносятся отдельным bulk_update по строкам пачки.
+        Обновление поддерживается для модели с одним уникальным полем
+        ключа. Возвращает количество обновленных строк."""
+        updated = 0
+        for batch in batches:
+            model.objects.bulk_create(
+                [model(**values) for values in batch],
+                ignore_conflicts=True
+            )
+            if not update_fields:
+                continue
+            key_field, = key_fields
+            existing = model.objects.in_bulk(
+                [values[key_field] for values in batch],
+                field_name=key_field
+            )
+            changed = []
+            for values in batch:
+                instance = existing.get(values[key_field])
+                if instance is None or all(
+                    getattr(instance, field) == values[field]
+                    for field in update_fields
+                ):
+                    continue
+                for field in update_fields:
+                    setattr(instance, field, values[field])
+                changed.append(instance)
+            model.objects.bulk_update(changed, update_fields)
+            updated += len(changed)
+        return updated
+
+    def copy_insert(self, model, fields, batches):
+        """Пишет пачки во временную таблицу через COPY и переносит их
+        в таблицу модели с пропуском конфликтующих строк."""
+        table = model._meta.db_table
+        columns = ', '.join(fields)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE import_{table} ON COMMIT DROP AS '
+                f'SELECT {columns} FROM {table} WITH NO DATA'
+            )
+            for batch in batches:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for values in batch:
+                    writer.writerow(values[field] for field in fields)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f'COPY import_{table} ({columns}) '
+                    f'FROM STDIN WITH (FORMAT csv)',
+                    buffer
+                )
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) '
+                f'SELECT {columns} FROM import_{table} '
+                f'ON CONFLICT DO NOTHING'
+            )
+
+    def load(self, model, path, fields, key_fields, options,
+             update_fields=()):
+        start = time.perf_counter()
+        processed = 0
+
+        def counted(rows):
+            nonlocal processed
+            for row in rows:
+                processed += 1
+                yield row
+
+        batches = iter_batches(
+            iter_unique(
+                counted(iter_rows(path, fields)),
+                fields,
+                key_fields
+            ),
+            options['batch_size']
+        )
+        before = model.objects.count()
+        updated = 0
+        if (options['copy'] and not update_fields
+                and connection.vendor == 'postgresql'):
+            self.copy_insert(model, fields, batches)
+        else:
+            updated = self.bulk_upsert(
+                model, key_fields, update_fields, batches
+            )
+        inserted = model.objects.count() - before
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: добавлено {inserted}, '
+            f'обновлено {updated}, '
+            f'пропущено {processed - inserted - updated}, '
+            f'{processed / elapsed if elapsed else processed:.0f} строк/с'
+        )
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.WARNING('Старт команды'))
-        with open('data/ingredients.json', encoding='utf-8',
-                  ) as data_file_ingredients:
-            ingredient_data = json.loads(data_file_ingredients.read())
-            for ingredients in ingredient_data:
-                Ingredient.objects.get_or_create(**ingredients)
-
-        with open('data/tags.json', encoding='utf-8',
-                  ) as data_file_tags:
-            tags_data = json.loads(data_file_tags.read())
-            for tags in tags_data:
-                Tag.objects.get_or_create(**tags)
-
+        with transaction.atomic():
+            self.load(
+                Ingredient,
+                options['ingredients'],
+                ('name', 'measurement_unit'),
+                ('name', 'measurement_unit'),
+                options
+            )
+            if options['tags']:
+                self.load(
+                    Tag,
+                    options['tags'],
+                    ('name', 'color', 'slug'),
+                    ('slug',),
+                    options,
+                    update_fields=('name', 'color')
+                )
+        bump_version('ingredients', 'tags')
         self.stdout.write(self.style.SUCCESS('Данные загружены'))
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.15 on 2026-10-18 02:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingCartJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('format', models.CharField(max_length=10, verbose_name='формат')),
+                ('status', models.CharField(choices=[('pending', 'в очереди'), ('running', 'выполняется'), ('done', 'готово'), ('failed', 'ошибка')], db_index=True, default='pending', max_length=10, verbose_name='статус')),
+                ('file', models.FileField(blank=True, upload_to='shopping_carts/', verbose_name='файл')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='дата создания')),
+            ],
+            options={
+                'verbose_name': 'Задача списка покупок',
+                'verbose_name_plural': 'Задачи списка покупок',
+                'ordering': ('created',),
+            },
+        ),
+        migrations.AddField(
+            model_name='shoppingcartjob',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_cart_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+    ]
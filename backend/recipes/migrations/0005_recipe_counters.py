@@ -0,0 +1,57 @@
+# Generated by Django 3.2.15 on 2026-10-18 02:37
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    # (модель со счетчиком, поле счетчика, связанная модель, поле связи)
+    (('recipes', 'Recipe'), 'favorites_count',
+     ('recipes', 'Favorite'), 'recipe'),
+    (('recipes', 'Recipe'), 'shopping_cart_count',
+     ('recipes', 'ShoppingCart'), 'recipe'),
+    (('users', 'User'), 'recipes_count',
+     ('recipes', 'Recipe'), 'author'),
+    (('users', 'User'), 'subscribers_count',
+     ('users', 'Subscription'), 'author'),
+)
+
+
+def recount_counters(apps, schema_editor):
+    """Заполняет новые счетчики одним UPDATE на каждый счетчик."""
+    for counted, field, related, related_field in COUNTERS:
+        related_model = apps.get_model(*related)
+        apps.get_model(*counted).objects.update(**{
+            field: Coalesce(
+                Subquery(
+                    related_model.objects.filter(
+                        **{related_field: OuterRef('pk')}
+                    ).order_by().values(related_field).annotate(
+                        count=Count('pk')
+                    ).values('count')
+                ),
+                0
+            )
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_ordering'),
+        ('users', '0003_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='добавлений в избранное'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='shopping_cart_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='добавлений в список покупок'),
+        ),
+        migrations.RunPython(recount_counters, migrations.RunPython.noop),
+    ]
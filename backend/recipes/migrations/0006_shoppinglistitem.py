@@ -0,0 +1,60 @@
+# Generated by Django 3.2.15 on 2026-10-18 02:38
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+import django.db.models.deletion
+
+
+def rebuild_shopping_lists(apps, schema_editor):
+    """Собирает сводные списки покупок из ShoppingCart
+    и IngredientAmount."""
+    model = apps.get_model('recipes', 'ShoppingListItem')
+    amounts = apps.get_model('recipes', 'IngredientAmount').objects.filter(
+        recipe__shopping_list__isnull=False
+    ).values(
+        'recipe__shopping_list__user', 'ingredient'
+    ).annotate(total_amount=Sum('amount')).order_by()
+    model.objects.bulk_create(
+        (
+            model(
+                user_id=item['recipe__shopping_list__user'],
+                ingredient_id=item['ingredient'],
+                total_amount=item['total_amount']
+            )
+            for item in amounts.iterator()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0005_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_amount', models.PositiveIntegerField(verbose_name='количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_items', to='recipes.ingredient', verbose_name='ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_items', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Строка списка покупок',
+                'verbose_name_plural': 'Строки списка покупок',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppinglistitem',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopping_list_item'),
+        ),
+        migrations.RunPython(
+            rebuild_shopping_lists, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 3.2.15 on 2026-10-18 02:52
+
+from django.contrib.postgres.aggregates import StringAgg
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+
+FTS_TABLE = 'recipes_recipe_fts'
+SEARCH_CONFIG = 'russian'
+
+CREATE = {
+    'postgresql': (
+        'CREATE INDEX IF NOT EXISTS recipes_recipe_search_idx '
+        'ON recipes_recipe USING gin (search_vector)',
+    ),
+    'sqlite': (
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+        f'name, text, ingredients, '
+        f'tokenize="unicode61 remove_diacritics 2")',
+    ),
+}
+
+DROP = {
+    'postgresql': ('DROP INDEX IF EXISTS recipes_recipe_search_idx',),
+    'sqlite': (f'DROP TABLE IF EXISTS {FTS_TABLE}',),
+}
+
+
+def create_search_index(apps, schema_editor):
+    """GIN-индекс по вектору для PostgreSQL или таблица FTS5 для SQLite,
+    затем заполнение индекса по всем рецептам."""
+    for statement in CREATE.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(statement)
+    fill_search_index(apps, schema_editor)
+
+
+def fill_search_index(apps, schema_editor):
+    """Вектор рецепта: название с весом A, описание с весом B
+    и названия ингредиентов с весом C."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        ingredients = apps.get_model(
+            'recipes', 'IngredientAmount'
+        ).objects.filter(recipe=OuterRef('pk')).order_by().values(
+            'recipe'
+        ).annotate(names=StringAgg('ingredient__name', ' ')).values('names')
+        apps.get_model('recipes', 'Recipe').objects.update(search_vector=(
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+            + SearchVector(
+                Coalesce(
+                    Subquery(ingredients, output_field=TextField()),
+                    Value('')
+                ),
+                weight='C',
+                config=SEARCH_CONFIG
+            )
+        ))
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, text, ingredients) '
+            f"SELECT recipe.id, recipe.name, recipe.text, ("
+            f"SELECT coalesce(group_concat(ingredient.name, ' '), '') "
+            f'FROM recipes_ingredientamount AS amount '
+            f'JOIN recipes_ingredient AS ingredient '
+            f'ON ingredient.id = amount.ingredient_id '
+            f'WHERE amount.recipe_id = recipe.id'
+            f') FROM recipes_recipe AS recipe'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    for statement in DROP.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_feedentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shoppingcartjob',
+            name='started',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='дата запуска'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Length
+
+MAX_UNIT_LENGTH = 10
+
+
+def check_ingredients(apps, schema_editor):
+    """Модель уже требует единицу измерения не длиннее 10 символов и
+    уникальную пару (название, единица), а база могла быть заполнена
+    до этого. Такие строки нужно исправить вручную: обрезка единицы
+    или удаление дубликата потеряли бы данные рецептов."""
+    ingredients = apps.get_model('recipes', 'Ingredient').objects
+    long_units = list(ingredients.annotate(
+        unit_length=Length('measurement_unit')
+    ).filter(unit_length__gt=MAX_UNIT_LENGTH).values_list('pk', flat=True))
+    duplicates = list(ingredients.values(
+        'name', 'measurement_unit'
+    ).annotate(count=Count('pk')).filter(count__gt=1).values_list(
+        'name', 'measurement_unit'
+    ))
+    if long_units or duplicates:
+        raise RuntimeError(
+            f'Исправьте ингредиенты перед миграцией: единица измерения '
+            f'длиннее {MAX_UNIT_LENGTH} символов у {long_units}, '
+            f'повторяются {duplicates}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_shoppingcartjob_started'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_ingredients, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='ingredient',
+            name='measurement_unit',
+            field=models.CharField(max_length=10, verbose_name='единица измерения'),
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
@@ -1,11 +1,16 @@
+import uuid
+
 from colorfield.fields import ColorField
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.db.models import UniqueConstraint
 
 from users.models import User
 
+from .counters import AtomicFieldsMixin
+
 
 class Tag(models.Model):
     """Класс тегов."""
@@ -64,9 +69,16 @@ class Ingredient(models.Model):
         return self.name[:settings.LENGTH_TEXT]
 
 
-class Recipe(models.Model):
+class Recipe(AtomicFieldsMixin, models.Model):
     """Класс рецептов."""
 
+    atomic_fields = (
+        'favorites_count',
+        'shopping_cart_count',
+        'image_variants',
+        'search_vector',
+    )
+
     ingredients = models.ManyToManyField(
         Ingredient,
         through='IngredientAmount',
@@ -83,6 +95,12 @@ class Recipe(models.Model):
         upload_to='recipes/',
         verbose_name='изображение'
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='уменьшенные копии изображения'
+    )
     name = models.CharField(
         max_length=200,
         verbose_name='Hазвание',
@@ -106,14 +124,42 @@ class Recipe(models.Model):
     )
     pub_date = models.DateTimeField(
         auto_now_add=True,
-        verbose_name='дата публикации',
-        db_index=True
+        verbose_name='дата публикации'
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='добавлений в избранное'
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='добавлений в список покупок'
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='поисковый вектор'
     )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='recipe_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('-favorites_count', '-pub_date', '-id'),
+                name='recipe_popular_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name[:settings.LENGTH_TEXT]
@@ -205,3 +251,159 @@ class ShoppingCart(FavoriteShoppingCart):
         default_related_name = 'shopping_list'
         verbose_name = 'Корзина'
         verbose_name_plural = 'Корзина'
+
+
+class ShoppingCartJob(models.Model):
+    """ Задача фоновой генерации файла списка покупок. """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'в очереди'),
+        (RUNNING, 'выполняется'),
+        (DONE, 'готово'),
+        (FAILED, 'ошибка'),
+    )
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_jobs',
+        verbose_name='Пользователь'
+    )
+    format = models.CharField(
+        max_length=10,
+        verbose_name='формат'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='статус'
+    )
+    file = models.FileField(
+        upload_to='shopping_carts/',
+        blank=True,
+        verbose_name='файл'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='дата создания'
+    )
+    started = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='дата запуска'
+    )
+
+    class Meta:
+        verbose_name = 'Задача списка покупок'
+        verbose_name_plural = 'Задачи списка покупок'
+        ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('status', 'created'),
+                name='shoppingcartjob_status_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user} :: {self.format} :: {self.status}'
+
+
+class ShoppingListItem(models.Model):
+    """ Суммарное количество ингредиента в списке покупок пользователя.
+
+    Поддерживается при изменении списка покупок и состава рецептов,
+    чтобы загрузка списка не пересчитывала его заново. """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='ингредиент'
+    )
+    total_amount = models.PositiveIntegerField(
+        verbose_name='количество'
+    )
+
+    class Meta:
+        verbose_name = 'Строка списка покупок'
+        verbose_name_plural = 'Строки списка покупок'
+        ordering = ('id',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_list_item'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user} :: {self.ingredient} :: {self.total_amount}'
+
+
+class FeedEntry(models.Model):
+    """ Рецепт в ленте подписок пользователя.
+
+    Строки создаются при публикации рецепта для всех подписчиков автора,
+    поэтому лента читается по одному индексу без объединения подписок
+    и рецептов. pub_date и author повторяют поля рецепта. """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пользователь'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='дата публикации'
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        ordering = ('-pub_date', '-recipe')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_entry'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='feedentry_timeline_idx'
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='feedentry_author_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user} :: {self.recipe}'
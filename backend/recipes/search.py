@@ -0,0 +1,160 @@
+from django.apps import apps
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import (Count, ExpressionWrapper, F, FloatField,
+                              OuterRef, Q, Subquery, TextField, Value)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce
+
+FTS_TABLE = 'recipes_recipe_fts'
+FTS_WEIGHTS = (10.0, 4.0, 1.0)
+
+
+def get_search_vector():
+    """Вектор рецепта: название с весом A, описание с весом B
+    и названия ингредиентов с весом C."""
+    config = settings.SEARCH_CONFIG
+    ingredients = apps.get_model(
+        'recipes', 'IngredientAmount'
+    ).objects.filter(
+        recipe=OuterRef('pk')
+    ).order_by().values('recipe').annotate(
+        names=StringAgg('ingredient__name', ' ')
+    ).values('names')
+    return (
+        SearchVector('name', weight='A', config=config)
+        + SearchVector('text', weight='B', config=config)
+        + SearchVector(
+            Coalesce(
+                Subquery(ingredients, output_field=TextField()), Value('')
+            ),
+            weight='C',
+            config=config
+        )
+    )
+
+
+def delete_fts(recipe_ids):
+    """Удаляет строки рецептов из таблицы FTS5 для SQLite."""
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(pk,) for pk in recipe_ids]
+        )
+
+
+def update_fts(recipes):
+    """Переписывает строки рецептов в таблице FTS5 для SQLite."""
+    rows = {
+        pk: [name, text, []]
+        for pk, name, text in recipes.values_list('pk', 'name', 'text')
+    }
+    ingredients = apps.get_model(
+        'recipes', 'IngredientAmount'
+    ).objects.filter(
+        recipe__in=rows
+    ).values_list('recipe_id', 'ingredient__name')
+    for recipe_id, name in ingredients:
+        rows[recipe_id][2].append(name)
+    delete_fts(rows)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, text, ingredients) '
+            f'VALUES (%s, %s, %s, %s)',
+            [
+                (pk, name, text, ' '.join(ingredients))
+                for pk, (name, text, ingredients) in rows.items()
+            ]
+        )
+
+
+def update_search_index(recipe_ids=None):
+    """Обновляет поисковый индекс рецептов, по умолчанию всех.
+
+    Вызывается после сохранения рецепта вместе с ингредиентами, так как
+    они создаются пакетно уже после сохранения самого рецепта."""
+    recipes = apps.get_model('recipes', 'Recipe').objects.all()
+    if recipe_ids is not None:
+        recipes = recipes.filter(pk__in=recipe_ids)
+    if connection.vendor == 'postgresql':
+        recipes.update(search_vector=get_search_vector())
+    elif connection.vendor == 'sqlite':
+        update_fts(recipes)
+
+
+def delete_from_search_index(recipe_ids):
+    """Убирает удаленные рецепты из поискового индекса. В PostgreSQL
+    вектор хранится в самом рецепте и удаляется вместе с ним."""
+    if connection.vendor == 'sqlite':
+        delete_fts(recipe_ids)
+
+
+def get_fts_query(value):
+    """Превращает строку поиска в запрос FTS5: все слова обязательны
+    и ищутся по префиксу, спецсимволы экранируются кавычками."""
+    return ' '.join(
+        '"{}"*'.format(word.replace('"', '""')) for word in value.split()
+    )
+
+
+def search_recipes(queryset, value):
+    """Отбирает рецепты по строке поиска и сортирует их по релевантности.
+
+    PostgreSQL ищет по полю search_vector с GIN-индексом, SQLite — по
+    таблице FTS5, остальные СУБД — через icontains."""
+    order = ('-rank', '-pub_date', '-id')
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(
+            value, config=settings.SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by(*order)
+    if connection.vendor == 'sqlite':
+        match = get_fts_query(value)
+        if not match:
+            return queryset.none()
+        table = queryset.model._meta.db_table
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (match,)
+        )).annotate(rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id',
+            (match,)
+        )).order_by(*order)
+    return queryset.filter(
+        Q(name__icontains=value) | Q(text__icontains=value)
+    )
+
+
+def discover_recipes(ingredient_ids, match='best', limit=None):
+    """Подбирает id рецептов по набору ингредиентов запросом к базе.
+
+    Порядок тот же, что у RecipeIngredientIndex.search: all — рецепты
+    со всеми ингредиентами набора, сначала новые; any — по числу
+    совпавших ингредиентов; best — по доле ингредиентов рецепта, которые
+    есть в наборе."""
+    ingredient_ids = set(ingredient_ids)
+    limit = limit or settings.RECIPE_DISCOVERY_LIMIT
+    amounts = apps.get_model('recipes', 'IngredientAmount').objects
+    matches = amounts.filter(ingredient__in=ingredient_ids).order_by(
+    ).values('recipe_id').annotate(matched=Count('pk'))
+    if match == 'all':
+        matches = matches.filter(
+            matched=len(ingredient_ids)
+        ).order_by('-recipe_id')
+    elif match == 'any':
+        matches = matches.order_by('-matched', '-recipe_id')
+    else:
+        total = amounts.filter(recipe=OuterRef('recipe_id')).order_by(
+        ).values('recipe_id').annotate(count=Count('pk')).values('count')
+        matches = matches.annotate(share=ExpressionWrapper(
+            Cast('matched', FloatField()) / Subquery(total),
+            output_field=FloatField()
+        )).order_by('-share', '-matched', '-recipe_id')
+    return list(matches.values_list('recipe_id', flat=True)[:limit])
@@ -0,0 +1,127 @@
+from collections import Counter
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Greatest
+
+from .models import IngredientAmount, ShoppingCart, ShoppingListItem
+
+
+def get_recipe_amounts(recipe_id):
+    """Возвращает состав рецепта: {id ингредиента: количество}."""
+    return dict(
+        IngredientAmount.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('ingredient_id', 'amount')
+    )
+
+
+@transaction.atomic
+def apply_amounts(user_ids, amounts):
+    """Прибавляет amounts ({id ингредиента: изменение}) к спискам покупок
+    пользователей, удаляя строки, в которых не осталось количества.
+
+    Недостающие строки вставляются с нулем и пропуском конфликтов, а
+    количество меняется одним UPDATE через F(), поэтому параллельные
+    изменения одного списка не теряются и не нарушают уникальность."""
+    amounts = {
+        ingredient_id: delta
+        for ingredient_id, delta in amounts.items() if delta
+    }
+    if not user_ids or not amounts:
+        return
+    ShoppingListItem.objects.bulk_create(
+        [
+            ShoppingListItem(
+                user_id=user_id,
+                ingredient_id=ingredient_id,
+                total_amount=0
+            )
+            for user_id in user_ids
+            for ingredient_id, delta in amounts.items() if delta > 0
+        ],
+        ignore_conflicts=True
+    )
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=amounts
+    )
+    items.update(total_amount=Greatest(
+        F('total_amount') + Case(
+            *(
+                When(ingredient_id=ingredient_id, then=Value(delta))
+                for ingredient_id, delta in amounts.items()
+            ),
+            default=Value(0),
+            output_field=IntegerField()
+        ),
+        0
+    ))
+    items.filter(total_amount=0).delete()
+
+
+def add_recipe(user_id, recipe_id):
+    """Рецепт добавлен в список покупок пользователя."""
+    apply_amounts([user_id], get_recipe_amounts(recipe_id))
+
+
+def remove_recipe(user_id, recipe_id):
+    """Рецепт удален из списка покупок пользователя."""
+    apply_amounts([user_id], {
+        ingredient_id: -amount
+        for ingredient_id, amount in get_recipe_amounts(recipe_id).items()
+    })
+
+
+def change_recipe(recipe_id, old_amounts, new_amounts):
+    """Переносит изменение состава рецепта в списки покупок всех
+    пользователей, у которых рецепт лежит в корзине."""
+    delta = Counter(new_amounts)
+    delta.subtract(old_amounts)
+    if not any(delta.values()):
+        return
+    apply_amounts(
+        list(ShoppingCart.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('user_id', flat=True)),
+        delta
+    )
+
+
+def get_expected_items(user_ids=None):
+    """Считает списки покупок заново из ShoppingCart и IngredientAmount."""
+    filters = {'recipe__shopping_list__isnull': False}
+    if user_ids is not None:
+        filters = {'recipe__shopping_list__user__in': user_ids}
+    amounts = apps.get_model('recipes', 'IngredientAmount').objects.filter(
+        **filters
+    )
+    return {
+        (item['recipe__shopping_list__user'], item['ingredient']):
+            item['total_amount']
+        for item in amounts.values(
+            'recipe__shopping_list__user', 'ingredient'
+        ).annotate(total_amount=Sum('amount')).order_by()
+    }
+
+
+@transaction.atomic
+def rebuild(user_ids=None):
+    """Пересобирает списки покупок пользователей (или всех) с нуля."""
+    model = apps.get_model('recipes', 'ShoppingListItem')
+    items = model.objects.all()
+    if user_ids is not None:
+        items = items.filter(user_id__in=user_ids)
+    items.delete()
+    model.objects.bulk_create(
+        (
+            model(
+                user_id=user_id,
+                ingredient_id=ingredient_id,
+                total_amount=total_amount
+            )
+            for (user_id, ingredient_id), total_amount
+            in get_expected_items(user_ids).items()
+        ),
+        batch_size=1000
+    )
@@ -0,0 +1,80 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from users.models import User
+
+from . import images, shopping_list, timeline, workers
+from .counters import change_counter
+from .models import Favorite, Ingredient, Recipe, ShoppingCart
+from .search import delete_from_search_index, update_search_index
+
+RECIPE_COUNTERS = {
+    Favorite: 'favorites_count',
+    ShoppingCart: 'shopping_cart_count',
+}
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def recipe_marked(sender, instance, created, **kwargs):
+    """Рецепт добавлен в избранное или в список покупок."""
+    if created:
+        change_counter(
+            Recipe, instance.recipe_id, RECIPE_COUNTERS[sender], 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def recipe_unmarked(sender, instance, **kwargs):
+    """Рецепт удален из избранного или из списка покупок."""
+    change_counter(Recipe, instance.recipe_id, RECIPE_COUNTERS[sender], -1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_published(sender, instance, created, **kwargs):
+    """Раскладывает новый рецепт по лентам подписчиков автора
+    в фоне, а без пула потоков — сразу."""
+    if created and not workers.submit(timeline.fan_out, instance.pk):
+        timeline.fan_out(instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_changed(sender, instance, **kwargs):
+    """Ставит в очередь построение копий нового изображения."""
+    if instance.image and not images.is_actual(instance):
+        workers.submit(images.generate_variants, instance.pk)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, 'recipes_count', -1)
+    delete_from_search_index([instance.pk])
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_added(sender, instance, created, **kwargs):
+    if created:
+        shopping_list.add_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def shopping_cart_removed(sender, instance, **kwargs):
+    """Срабатывает до удаления, чтобы при каскадном удалении рецепта
+    его ингредиенты еще были в базе."""
+    shopping_list.remove_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_renamed(sender, instance, created, **kwargs):
+    """Название ингредиента входит в поисковый индекс рецептов."""
+    if not created:
+        update_search_index(
+            instance.recipes.values_list('pk', flat=True)
+        )
@@ -0,0 +1,125 @@
+from datetime import timedelta
+from itertools import islice
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+
+def get_recipes(author_ids):
+    """Последние рецепты авторов в виде (id, id автора, дата)."""
+    return apps.get_model('recipes', 'Recipe').objects.filter(
+        author_id__in=author_ids
+    ).order_by('-pub_date', '-id').values_list('pk', 'author_id', 'pub_date')
+
+
+def add_entries(user_ids, recipes):
+    """Добавляет рецепты в ленты пользователей пачками, пропуская
+    уже добавленные."""
+    model = apps.get_model('recipes', 'FeedEntry')
+    recipes = list(recipes)
+    entries = (
+        model(
+            user_id=user_id,
+            recipe_id=recipe_id,
+            author_id=author_id,
+            pub_date=pub_date
+        )
+        for user_id in user_ids
+        for recipe_id, author_id, pub_date in recipes
+    )
+    while batch := list(islice(entries, BATCH_SIZE)):
+        model.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(recipe_id):
+    """Раскладывает новый рецепт по лентам подписчиков автора.
+
+    Рецепты авторов, у которых подписчиков больше FEED_FANOUT_LIMIT,
+    не рассылаются: подписчики забирают их сами при чтении ленты."""
+    recipe = apps.get_model('recipes', 'Recipe').objects.filter(
+        pk=recipe_id,
+        author__subscribers_count__lte=settings.FEED_FANOUT_LIMIT
+    ).values_list('pk', 'author_id', 'pub_date').first()
+    if recipe is None:
+        return
+    subscribers = apps.get_model('users', 'Subscription').objects.filter(
+        author_id=recipe[1]
+    ).values_list('subscriber_id', flat=True)
+    add_entries(subscribers.iterator(chunk_size=BATCH_SIZE), [recipe])
+
+
+def backfill(subscriber_id, author_id):
+    """Добавляет в ленту нового подписчика последние рецепты автора."""
+    add_entries(
+        [subscriber_id],
+        get_recipes([author_id])[:settings.FEED_BACKFILL_LIMIT]
+    )
+
+
+def trim(subscriber_id, author_id):
+    """Убирает из ленты рецепты автора после отписки."""
+    apps.get_model('recipes', 'FeedEntry').objects.filter(
+        user_id=subscriber_id, author_id=author_id
+    ).delete()
+
+
+def pull(user_id):
+    """Забирает в ленту новые рецепты всех авторов подписок.
+
+    Для авторов без рассылки это единственный путь в ленту, для
+    остальных — сверка с рассылкой: записи, которые не добавил упавший
+    фоновый процесс, и рецепты, опубликованные, пока у автора было
+    больше FEED_FANOUT_LIMIT подписчиков, появятся при чтении ленты.
+    Уже добавленные рецепты пропускаются.
+
+    Забираются рецепты, опубликованные после предыдущего чтения ленты
+    с запасом FEED_PULL_OVERLAP секунд на транзакции, которые еще не
+    были зафиксированы. Время чтения хранится у пользователя; при первом
+    чтении забираются последние FEED_BACKFILL_LIMIT рецептов, как при
+    подписке, а дальше — все новые рецепты пачками по столько же."""
+    subscriptions = list(
+        apps.get_model('users', 'Subscription').objects.filter(
+            subscriber_id=user_id
+        ).values_list('author_id', 'subscriber__feed_pulled_at')
+    )
+    if not subscriptions:
+        return
+    author_ids = [author_id for author_id, _ in subscriptions]
+    since = subscriptions[0][1]
+    pulled = timezone.now() - timedelta(seconds=settings.FEED_PULL_OVERLAP)
+    recipes = get_recipes(author_ids)
+    if since is None:
+        add_entries([user_id], recipes[:settings.FEED_BACKFILL_LIMIT])
+    else:
+        recipes = recipes.filter(pub_date__gte=since).order_by(
+            'pub_date', 'pk'
+        )
+        batch = list(recipes[:settings.FEED_BACKFILL_LIMIT])
+        while batch:
+            add_entries([user_id], batch)
+            if len(batch) < settings.FEED_BACKFILL_LIMIT:
+                break
+            recipe_id, _, pub_date = batch[-1]
+            batch = list(recipes.filter(
+                Q(pub_date__gt=pub_date)
+                | Q(pub_date=pub_date, pk__gt=recipe_id)
+            )[:settings.FEED_BACKFILL_LIMIT])
+    apps.get_model('users', 'User').objects.filter(pk=user_id).update(
+        feed_pulled_at=pulled
+    )
+
+
+@transaction.atomic
+def rebuild():
+    """Пересобирает ленты всех пользователей по подпискам."""
+    apps.get_model('recipes', 'FeedEntry').objects.all().delete()
+    subscriptions = apps.get_model(
+        'users', 'Subscription'
+    ).objects.values_list('subscriber_id', 'author_id')
+    for subscriber_id, author_id in subscriptions.iterator():
+        backfill(subscriber_id, author_id)
@@ -0,0 +1,43 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    """Пул потоков процесса для фоновых задач."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_WORKERS,
+            thread_name_prefix='background'
+        )
+    return _executor
+
+
+def _run_in_thread(function, *args):
+    close_old_connections()
+    try:
+        function(*args)
+    except Exception:
+        logger.exception('Ошибка фоновой задачи %s', function.__name__)
+    finally:
+        close_old_connections()
+
+
+def submit(function, *args):
+    """Ставит вызов в пул потоков после фиксации транзакции.
+
+    Возвращает False, если пул отключен (BACKGROUND_WORKERS = 0):
+    тогда задачу выполняет соответствующая management-команда."""
+    if not settings.BACKGROUND_WORKERS:
+        return False
+    transaction.on_commit(
+        lambda: get_executor().submit(_run_in_thread, function, *args)
+    )
+    return True
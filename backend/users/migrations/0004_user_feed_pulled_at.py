@@ -0,0 +1,24 @@
+# Generated by Django 3.2.15 on 2026-10-18 03:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    replaces = [
+        ('users', '0004_subscription_subscriber_index'),
+        ('users', '0005_remove_subscription_subscriber_index'),
+        ('users', '0006_user_feed_pulled_at'),
+    ]
+
+    dependencies = [
+        ('users', '0003_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='feed_pulled_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='рецепты забраны в ленту до'),
+        ),
+    ]
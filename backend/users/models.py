@@ -3,12 +3,20 @@ from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.db import models
 
+from recipes.counters import AtomicFieldsMixin
 from users.validators import validate_username
 
 
-class User(AbstractUser):
+class User(AtomicFieldsMixin, AbstractUser):
     """Класс пользователей."""
 
+    atomic_fields = (
+        'shopping_cart_version',
+        'recipes_count',
+        'subscribers_count',
+        'feed_pulled_at',
+    )
+
     email = models.EmailField(
         max_length=254,
         verbose_name='email',
@@ -30,6 +38,27 @@ class User(AbstractUser):
         max_length=settings.LENGTH_OF_FIELDS_USER,
         verbose_name='фамилия'
     )
+    shopping_cart_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='версия списка покупок'
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='количество рецептов'
+    )
+    subscribers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='количество подписчиков'
+    )
+    feed_pulled_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='рецепты забраны в ленту до'
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = (
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes import timeline
+from recipes.counters import change_counter
+
+from .models import Subscription, User
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'subscribers_count', 1)
+        timeline.backfill(instance.subscriber_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, 'subscribers_count', -1)
+    timeline.trim(instance.subscriber_id, instance.author_id)